@@ -1,3 +1,5 @@
+import multiprocessing
+import os
 import random
 from typing import Optional
 
@@ -5,10 +7,15 @@ import geopandas as gpd
 import matplotlib.pyplot as plt
 import networkx as nx
 import numpy as np
+import pandas as pd
+import shapely
 from deap import algorithms, base, creator, tools
-from shapely.geometry import LineString, Point
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from shapely import STRtree
+from shapely.geometry import LineString
 
-from .network_design import *
+from .network_design import grafo_para_matriz_esparsa, reconstruir_caminho
 
 
 class OtimizadorRotas:
@@ -16,79 +23,97 @@ class OtimizadorRotas:
 		print("Iniciando Otimizador")
 		self.grafo = grafo
 		self.gdf_bairros = gdf_bairros
-		self.bairros_dict = {idx: {"geom": row.geometry.centroid, "nome": row.NM_BAIRRO} for idx, row in gdf_bairros.iterrows()}
-		self.indices_bairros = list(self.bairros_dict.keys())
+		# Os genes referenciam os bairros pela posição (0..N-1) em gdf_bairros, o que permite indexar os caches diretamente
+		self.centroides_bairros = shapely.centroid(gdf_bairros.geometry.values)
 		self.qtd_bairros = len(gdf_bairros)
+		self.indices_bairros = list(range(self.qtd_bairros))
 
-		self.cache_rotas = {}
-		self.nos_grafo_multipoint = None
+		# Índice espacial dos polígonos dos bairros, consultado diretamente para saber quais bairros cada rota atravessa
+		self.arvore_bairros = STRtree(gdf_bairros.geometry.values)
+		# Cada nome de bairro recebe um id inteiro; a cobertura de um indivíduo é marcada em um vetor booleano indexado por esses ids
+		ids_nomes, nomes_unicos = pd.factorize(gdf_bairros["NM_BAIRRO"], use_na_sentinel=False)
+		self.id_nome_bairro = ids_nomes.astype(np.int32)
+		self.nomes_bairros = np.asarray(nomes_unicos, dtype=object)
+
+		# Cache das rotas por par (origem, destino): distâncias em array (NaN = ainda não calculada) e os demais dados em lista de listas
+		self.cache_distancias = np.full((self.qtd_bairros, self.qtd_bairros), np.nan, dtype=np.float64)
+		self.cache_rotas: list[list[Optional[dict]]] = [[None] * self.qtd_bairros for _ in range(self.qtd_bairros)]
 
 		self._preparar_grafo()
 		# self._pre_calcular_todas_rotas()
 
-	def _calcular_rota_individual(
-		self, grafo: nx.MultiDiGraph, no_origem: tuple[float, float], no_destino: tuple[float, float], sentido: str = "IDA"
-	) -> Optional[LineString]:
-		"""
-		Calcula o caminho mínimo entre dois nós e retorna a geometria da linha.
-		"""
-		# Define quem é source e target baseado no sentido
-		if sentido == "IDA":
-			source, target = no_origem, no_destino
-		else:
-			source, target = no_destino, no_origem
+	def _preparar_grafo(self):
+		"""Cria índice espacial dos nós do grafo para busca rápida e a matriz esparsa usada no Dijkstra."""
+		self.cache_predecessores: dict[int, np.ndarray] = {}
 
-		try:
-			# O Dijkstra retorna uma lista de nós: [(x1,y1), (x2,y2), ...]
-			caminho_nos = nx.dijkstra_path(grafo, source=source, target=target, weight="weight")
+		self.bairro_para_no: dict[int, int] = {}
 
-			# Se o caminho for trivial (apenas 1 ponto), não forma linha
-			if len(caminho_nos) < 2:
-				return None
+		if self.grafo.number_of_nodes() > 0:
+			self.matriz_grafo, self.nos_grafo, self.indice_nos = grafo_para_matriz_esparsa(self.grafo)
+			# Os nós do grafo são as próprias tuplas (x, y), lidas direto para um array (N, 2) sem criar objetos Point
+			self.coords_nos = np.fromiter(self.nos_grafo, dtype=np.dtype((np.float64, 2)), count=len(self.nos_grafo))
 
-			# Cria a geometria da linha conectando os nós
-			return LineString(caminho_nos)
+			# Nó mais próximo de cada centroide, calculado de uma vez só (os índices seguem a ordem de self.nos_grafo)
+			self.arvore_nos = cKDTree(self.coords_nos)
+			_, nos_mais_proximos = self.arvore_nos.query(shapely.get_coordinates(self.centroides_bairros))
+			self.bairro_para_no = {idx: int(no) for idx, no in zip(self.indices_bairros, nos_mais_proximos, strict=True)}
 
-		except nx.NetworkXNoPath:
-			# Não existe caminho entre os pontos (ilhas desconexas no grafo)
-			return None
-		except Exception:
-			# Captura erros genéricos de topologia para não quebrar o loop genético
-			# print(f"Erro ao calcular rota: {e}")
-			return None
+	def _calcular_origens(self, indices_origem):
+		"""
+		Executa um único Dijkstra (em C, via scipy) para cada nó de origem ainda não calculado e guarda a árvore de predecessores.
 
-	def _preparar_grafo(self):
-		"""Cria índice espacial dos nós do grafo para busca rápida."""
-		from shapely.geometry import MultiPoint
+		A árvore de uma origem atende a todos os destinos, então as rotas que compartilham a origem reaproveitam a mesma busca.
+		"""
+		faltantes = np.unique([i for i in indices_origem if i not in self.cache_predecessores])
+		if faltantes.size == 0:
+			return
 
-		if self.grafo.number_of_nodes() > 0:
-			self.nos_grafo_multipoint = MultiPoint([Point(no) for no in self.grafo.nodes()])
+		_, predecessores = dijkstra(self.matriz_grafo, directed=True, indices=faltantes, return_predecessors=True)
+		for idx, linha in zip(faltantes, predecessores, strict=True):
+			self.cache_predecessores[int(idx)] = linha
 
-	def _rota_entre_bairros(self, idx_origem, idx_destino):
-		"""Calcula rota e bairros atendidos entre dois centroids."""
-		if (idx_origem, idx_destino) in self.cache_rotas:
-			return self.cache_rotas[(idx_origem, idx_destino)]
+	def _caminho_entre_bairros(self, idx_origem, idx_destino) -> Optional[list[int]]:
+		"""Retorna os índices dos nós do caminho mínimo entre os centroides de dois bairros, ou None se não houver caminho."""
+		no_origem = self.bairro_para_no[idx_origem]
+		no_destino = self.bairro_para_no[idx_destino]
 
-		p1 = self.bairros_dict[idx_origem]["geom"]
-		p2 = self.bairros_dict[idx_destino]["geom"]
+		self._calcular_origens([no_origem])
+		return reconstruir_caminho(self.cache_predecessores[no_origem], no_origem, no_destino)
 
-		no_origem = encontrar_no_mais_proximo(p1, self.nos_grafo_multipoint)
-		no_destino = encontrar_no_mais_proximo(p2, self.nos_grafo_multipoint)
+	def _rota_entre_bairros(self, idx_origem, idx_destino):
+		"""
+		Calcula a distância e os bairros atendidos pela rota entre dois centroids.
 
-		geom_linha = self._calcular_rota_individual(self.grafo, no_origem, no_destino, "IDA")
+		Apenas os dados usados na aptidão ficam no cache; a geometria é reconstruída sob demanda por `_geometria_rota`.
+		"""
+		dados = self.cache_rotas[idx_origem][idx_destino]
+		if dados is not None:
+			return dados
+
+		caminho = self._caminho_entre_bairros(idx_origem, idx_destino)
 
-		if geom_linha is None:
-			dados = {"dist": float("inf"), "bairros": set(), "geom": None}
+		# Caminho inexistente (ilhas desconexas no grafo) ou trivial (apenas 1 ponto) não forma linha
+		if caminho is None or len(caminho) < 2:
+			dados = {"dist": float("inf"), "bairro_ids": np.empty(0, dtype=np.int32)}
 		else:
-			gdf_linha = gpd.GeoDataFrame([{"geometry": geom_linha}], crs=self.gdf_bairros.crs)
-			intersecoes = gpd.sjoin(gdf_linha, self.gdf_bairros, how="inner", predicate="intersects")
-			nomes_atendidos = set(intersecoes["NM_BAIRRO"].unique())
+			linha = shapely.linestrings(self.coords_nos[caminho])
+			intersecoes = self.arvore_bairros.query(linha, predicate="intersects")
+			ids_atendidos = np.unique(self.id_nome_bairro[intersecoes])
 
-			dados = {"dist": geom_linha.length, "bairros": nomes_atendidos, "geom": geom_linha}
+			dados = {"dist": float(shapely.length(linha)), "bairro_ids": ids_atendidos}
 
-		self.cache_rotas[(idx_origem, idx_destino)] = dados
+		self.cache_rotas[idx_origem][idx_destino] = dados
+		self.cache_distancias[idx_origem, idx_destino] = dados["dist"]
 		return dados
 
+	def _geometria_rota(self, idx_origem, idx_destino) -> Optional[LineString]:
+		"""Reconstrói a geometria da rota entre dois bairros a partir da árvore de predecessores em cache."""
+		caminho = self._caminho_entre_bairros(idx_origem, idx_destino)
+		if caminho is None or len(caminho) < 2:
+			return None
+
+		return LineString(self.coords_nos[caminho])
+
 	# def _pre_calcular_todas_rotas(self):
 	# 	"""
 	# 	Gera o cache. ATENÇÃO: Isso pode demorar dependendo do tamanho do grafo. Para testes rápidos, reduza o número de bairros.
@@ -104,53 +129,69 @@ class OtimizadorRotas:
 
 	# --- Configuração do Algoritmo Genético (DEAP) ---
 
-	def setup_ga(self):
-		creator.create("FitnessMulti", base.Fitness, weights=(-1.0, -1.0))
-		creator.create("Individual", list, fitness=creator.FitnessMulti)
+	def avaliar(self, individual):
+		"""Função de aptidão: retorna a distância total das rotas e a fração de bairros não atendidos (ambas a minimizar)."""
+		genes = np.asarray(individual, dtype=np.intp).reshape(-1, 2)
 
-		toolbox = base.Toolbox()
+		# Genes repetidos são avaliados uma única vez; a distância de cada rota é multiplicada pelo número de ocorrências
+		pares, contagens = np.unique(genes[:, 0] * self.qtd_bairros + genes[:, 1], return_counts=True)
+		origens, destinos = np.divmod(pares, self.qtd_bairros)
+		distancias = self.cache_distancias[origens, destinos]
 
-		# 2. Gerador de Genes: Um par (origem, destino)
-		def gerar_gene_rota():
-			return tuple(random.sample(self.indices_bairros, 2))
+		pendentes = np.isnan(distancias)
+		if pendentes.any():
+			# Agrupa as rotas ainda não calculadas por origem: um Dijkstra por origem atende todos os destinos
+			self._calcular_origens([self.bairro_para_no[origem] for origem in np.unique(origens[pendentes])])
+			for origem, destino in zip(origens[pendentes], destinos[pendentes], strict=True):
+				self._rota_entre_bairros(origem, destino)
+			distancias = self.cache_distancias[origens, destinos]
 
-		# 3. Gerador de Indivíduos: Lista de rotas (tamanho variável 20 a 40)
-		def gerar_individuo():
-			tamanho = random.randint(20, 40)
-			return creator.Individual([gerar_gene_rota() for _ in range(tamanho)])
+		total_distancia = float((np.where(np.isinf(distancias), 100000, distancias) * contagens).sum())
 
-		toolbox.register("attr_rota", gerar_gene_rota)
-		toolbox.register("individual", gerar_individuo)
-		toolbox.register("population", tools.initRepeat, list, toolbox.individual)
+		bairros_atendidos = np.zeros(len(self.nomes_bairros), dtype=bool)
+		bairros_atendidos[
+			np.concatenate([self.cache_rotas[origem][destino]["bairro_ids"] for origem, destino in zip(origens, destinos, strict=True)])
+		] = True
 
-		def evaluate(individual):
-			total_distancia = 0.0
-			bairros_atendidos = set()
+		return total_distancia, 1 - (int(bairros_atendidos.sum()) / self.qtd_bairros)
 
-			for origem, destino in individual:
-				dados_rota = self._rota_entre_bairros(origem, destino)
+	def setup_ga(self):
+		_criar_tipos_deap()
 
-				if dados_rota["dist"] == float("inf"):
-					total_distancia += 100000
-				else:
-					total_distancia += dados_rota["dist"]
-					bairros_atendidos.update(dados_rota["bairros"])
+		toolbox = base.Toolbox()
 
-			return total_distancia, 1 - (len(bairros_atendidos) / self.qtd_bairros)
+		# 2. Gerador de Genes: Um par (origem, destino)
+		def gerar_gene_rota():
+			return np.array(random.sample(self.indices_bairros, 2), dtype=np.int32)
 
-		toolbox.register("evaluate", evaluate)
+		# 3. Geração da população inicial: indivíduos (L, 2) de tamanho variável (20 a 40). Todos os genes são sorteados de uma vez, em
+		# lote, e cada indivíduo é uma fatia do bloco.
+		# O destino é sorteado entre N-1 bairros e deslocado quando >= origem, o que garante origem != destino sem reamostragem.
+		def gerar_populacao(n):
+			rng = np.random.default_rng(random.getrandbits(64))
+			tamanhos = rng.integers(20, 41, size=n)
+			origens = rng.integers(0, self.qtd_bairros, size=(n, 40))
+			destinos = rng.integers(0, self.qtd_bairros - 1, size=(n, 40))
+			destinos += destinos >= origens
+			genes = np.stack([origens, destinos], axis=2).astype(np.int32)
+			return [creator.Individual(genes[i, :tamanho]) for i, tamanho in enumerate(tamanhos)]
 
-		toolbox.register("mate", tools.cxTwoPoint)
+		toolbox.register("population", gerar_populacao)
+
+		toolbox.register("evaluate", self.avaliar)
+
+		toolbox.register("mate", _cruzamento_dois_pontos)
 
 		def mutacao_variavel(individual):
 			r = random.random()
 
+			# Remoção e inserção mudam o tamanho do array, então retornam um novo indivíduo
 			if r < 0.33 and len(individual) > 20:
 				idx = random.randrange(len(individual))
-				del individual[idx]
+				individual = creator.Individual(np.delete(individual, idx, axis=0))
 
 			elif r < 0.66 and len(individual) < 40:
-				individual.append(gerar_gene_rota())
+				individual = creator.Individual(np.vstack([individual, gerar_gene_rota()]))
 
 			else:
 				idx = random.randrange(len(individual))
@@ -159,11 +200,21 @@ class OtimizadorRotas:
 			return (individual,)
 
 		toolbox.register("mutate", mutacao_variavel)
-		toolbox.register("select", tools.selNSGA2)
+		toolbox.register("select", _selecionar_nsga2)
 
 		return toolbox
 
-	def rodar_algoritmo(self, n_geracoes=50, n_populacao=100):
+	def rodar_algoritmo(self, n_geracoes=50, n_populacao=100, n_processos: int = 1):
+		"""
+		Executa o algoritmo genético (NSGA-II com estratégia mu + lambda).
+
+		Args:
+			n_geracoes: Número de gerações.
+			n_populacao: Tamanho da população.
+			n_processos: Número de processos usados para avaliar a aptidão dos indivíduos em paralelo. Com 1 (padrão) a avaliação é sequencial;
+				None usa todos os núcleos. Cada processo recebe uma cópia do otimizador e mantém o próprio cache de rotas. Em sistemas que
+				usam "spawn" (Windows/macOS), o script chamador deve estar protegido por `if __name__ == "__main__":`.
+		"""
 		toolbox = self.setup_ga()
 		pop = toolbox.population(n=n_populacao)
 
@@ -172,9 +223,19 @@ class OtimizadorRotas:
 		stats.register("min", np.min, axis=0)
 		stats.register("max", np.max, axis=0)
 
-		pop, logbook = algorithms.eaMuPlusLambda(
-			pop, toolbox, mu=n_populacao, lambda_=n_populacao, cxpb=0.4, mutpb=0.5, ngen=n_geracoes, stats=stats, verbose=True
-		)
+		if n_processos == 1:
+			pop, logbook = algorithms.eaMuPlusLambda(
+				pop, toolbox, mu=n_populacao, lambda_=n_populacao, cxpb=0.4, mutpb=0.5, ngen=n_geracoes, stats=stats, verbose=True
+			)
+			return pop, logbook
+
+		with multiprocessing.Pool(n_processos or os.cpu_count(), initializer=_inicializar_worker, initargs=(self,)) as pool:
+			toolbox.register("evaluate", _avaliar_no_worker)
+			toolbox.register("map", pool.map)
+
+			pop, logbook = algorithms.eaMuPlusLambda(
+				pop, toolbox, mu=n_populacao, lambda_=n_populacao, cxpb=0.4, mutpb=0.5, ngen=n_geracoes, stats=stats, verbose=True
+			)
 
 		return pop, logbook
 
@@ -186,11 +247,11 @@ class OtimizadorRotas:
 			populacao: A população final do algoritmo genético.
 			criterio: 'mediana' (equilíbrio), 'custo' (menor distância) ou 'cobertura' (maior abrangência).
 		"""
-		pareto_front = tools.sortNondominated(populacao, len(populacao), first_front_only=True)[0]
+		pareto_front = _fronteira_pareto(populacao)
 
 		if not pareto_front:
 			print("Nenhuma solução encontrada.")
-			return gpd.GeoDataFrame(crs=self.gdf_bairros.crs)
+			return gpd.GeoDataFrame(geometry=[], crs=self.gdf_bairros.crs)
 
 		if criterio == "custo":
 			melhor_ind = min(pareto_front, key=lambda ind: ind.fitness.values[0])
@@ -212,25 +273,194 @@ class OtimizadorRotas:
 
 		print(f"Detalhes da Solução: Distância Total: {distancia_total:.2f}m | Abrangência Cobertos: {1 - abrangencia}")
 
-		gdf_final = []
-		for i, (orig, dest) in enumerate(melhor_ind):
+		# As colunas são montadas diretamente, sem passar por uma lista de dicionários
+		genes = np.asarray(melhor_ind, dtype=np.intp).reshape(-1, 2)
+		geometrias, ids, bairros_atendidos, qtd_bairros, distancias, origens, destinos = [], [], [], [], [], [], []
+		for i, (orig, dest) in enumerate(genes):
 			dados = self._rota_entre_bairros(orig, dest)
+			geom = self._geometria_rota(orig, dest)
+
+			if geom is not None:
+				geometrias.append(geom)
+				ids.append(i)
+				bairros_atendidos.append(", ".join(self.nomes_bairros[dados["bairro_ids"]]))
+				qtd_bairros.append(len(dados["bairro_ids"]))
+				distancias.append(dados["dist"])
+				origens.append(orig)
+				destinos.append(dest)
+
+		if not geometrias:
+			return gpd.GeoDataFrame(geometry=[], crs=self.gdf_bairros.crs)
+
+		return gpd.GeoDataFrame(
+			{
+				"geometry": geometrias,
+				"id": ids,
+				"bairros_atendidos": bairros_atendidos,
+				"qtd_bairros": qtd_bairros,
+				"distancia": distancias,
+				"origem_idx": self.gdf_bairros.index[origens],
+				"destino_idx": self.gdf_bairros.index[destinos],
+			},
+			crs=self.gdf_bairros.crs,
+		)
+
+
+def _criar_tipos_deap():
+	"""
+	Registra no `creator` do DEAP os tipos de aptidão e de indivíduo, caso ainda não existam (inclusive em processos filhos).
+
+	O indivíduo é um `np.ndarray` de inteiros com formato (L, 2), em que cada linha é um gene (origem, destino).
+	"""
+	if not hasattr(creator, "FitnessMulti"):
+		creator.create("FitnessMulti", base.Fitness, weights=(-1.0, -1.0))
+	if not hasattr(creator, "Individual"):
+		creator.create("Individual", np.ndarray, fitness=creator.FitnessMulti)
+
+
+def _cruzamento_dois_pontos(ind1, ind2):
+	"""
+	Equivalente a `tools.cxTwoPoint` para indivíduos em `np.ndarray`.
+
+	As fatias de um array são views, então a troca precisa de uma cópia explícita (a troca por tupla do DEAP corromperia os dois indivíduos).
+	"""
+	tamanho = min(len(ind1), len(ind2))
+	ponto1 = random.randint(1, tamanho)
+	ponto2 = random.randint(1, tamanho - 1)
+	if ponto2 >= ponto1:
+		ponto2 += 1
+	else:
+		ponto1, ponto2 = ponto2, ponto1
+
+	trecho = ind1[ponto1:ponto2].copy()
+	ind1[ponto1:ponto2] = ind2[ponto1:ponto2]
+	ind2[ponto1:ponto2] = trecho
+
+	return ind1, ind2
+
+
+def _ordenar_nao_dominados(valores_ponderados: np.ndarray, k: int) -> list[np.ndarray]:
+	"""
+	Ordenação não dominada (Deb et al.) vetorizada, equivalente a `tools.emo.sortNondominated`.
+
+	Retorna os índices de cada frente de Pareto, da melhor para a pior, parando assim que as frentes somam pelo menos `k` indivíduos. A
+	ordem dentro de cada frente é a mesma do DEAP, da qual depende o desempate da distância de aglomeração: indivíduos com a mesma aptidão
+	ficam juntos, na ordem da primeira ocorrência, e cada aptidão entra na frente seguinte logo após o último dos seus dominadores na frente
+	atual.
+
+	Args:
+		valores_ponderados: Array (N, M) com os `fitness.wvalues` (maior é melhor em todos os objetivos).
+		k: Quantidade mínima de indivíduos a ser coberta pelas frentes retornadas.
+	"""
+	if k == 0 or len(valores_ponderados) == 0:
+		return []
+
+	# Somar 0.0 troca -0.0 por 0.0, que o DEAP considera a mesma aptidão
+	unicos, primeiras, inversa = np.unique(valores_ponderados + 0.0, axis=0, return_index=True, return_inverse=True)
+	ordem_aptidoes = np.argsort(primeiras)
+	unicos = unicos[ordem_aptidoes]
+	posicao_aptidao = np.empty_like(ordem_aptidoes)
+	posicao_aptidao[ordem_aptidoes] = np.arange(len(ordem_aptidoes))
+	aptidao_de_cada = posicao_aptidao[inversa.ravel()]
+
+	tamanhos = np.bincount(aptidao_de_cada, minlength=len(unicos))
+	membros = np.split(np.argsort(aptidao_de_cada, kind="stable"), np.cumsum(tamanhos)[:-1])
+
+	a = unicos[:, None, :]
+	b = unicos[None, :, :]
+	# domina[i, j]: i é pelo menos tão bom quanto j em todos os objetivos e estritamente melhor em algum
+	domina = (a >= b).all(axis=2) & (a > b).any(axis=2)
+
+	qtd_dominadores = domina.sum(axis=0)
+	ordenadas = qtd_dominadores == 0
+	frente = np.flatnonzero(ordenadas)
+	frentes = []
+	total = 0
+	limite = min(len(valores_ponderados), k)
+
+	while True:
+		frentes.append(np.concatenate([membros[i] for i in frente]))
+		total += int(tamanhos[frente].sum())
+		if total >= limite:
+			return frentes
+
+		dominadas_pela_frente = domina[frente]
+		qtd_dominadores -= dominadas_pela_frente.sum(axis=0)
+		proxima = np.flatnonzero(~ordenadas & (qtd_dominadores == 0))
+		ordenadas[proxima] = True
+
+		posicoes = np.arange(len(frente))[:, None]
+		ultimo_dominador = np.where(dominadas_pela_frente[:, proxima], posicoes, -1).max(axis=0)
+		frente = proxima[np.lexsort((proxima, ultimo_dominador))]
+
+
+def _distancia_aglomeracao(valores: np.ndarray) -> np.ndarray:
+	"""
+	Distância de aglomeração (crowding distance) de cada indivíduo de uma frente, como em `tools.emo.assignCrowdingDist`.
+
+	Assim como no DEAP, cada objetivo reordena de forma estável a ordem deixada pelo objetivo anterior, o que define os extremos e os
+	vizinhos quando há valores empatados.
+	"""
+	n, qtd_objetivos = valores.shape
+	distancias = np.zeros(n)
+	if n == 0:
+		return distancias
+
+	ordem = np.arange(n)
+	for objetivo in range(qtd_objetivos):
+		ordem = ordem[np.argsort(valores[ordem, objetivo], kind="stable")]
+		ordenados = valores[ordem, objetivo]
+		distancias[ordem[0]] = np.inf
+		distancias[ordem[-1]] = np.inf
+
+		norma = qtd_objetivos * (ordenados[-1] - ordenados[0])
+		if norma == 0:
+			continue
+
+		distancias[ordem[1:-1]] += (ordenados[2:] - ordenados[:-2]) / norma
+
+	return distancias
+
+
+def _selecionar_nsga2(individuos, k):
+	"""Seleção NSGA-II equivalente a `tools.selNSGA2`, com a ordenação não dominada e a distância de aglomeração feitas em NumPy."""
+	valores_ponderados = np.array([ind.fitness.wvalues for ind in individuos])
+	frentes = _ordenar_nao_dominados(valores_ponderados, k)
+
+	escolhidos = [individuos[i] for frente in frentes[:-1] for i in frente]
+	faltantes = k - len(escolhidos)
+
+	if faltantes > 0 and frentes:
+		ultima_frente = frentes[-1]
+		distancias = _distancia_aglomeracao(np.array([individuos[i].fitness.values for i in ultima_frente]))
+		ordem = np.argsort(-distancias, kind="stable")
+		escolhidos.extend(individuos[i] for i in ultima_frente[ordem[:faltantes]])
+
+	return escolhidos
+
+
+def _fronteira_pareto(individuos) -> list:
+	"""Retorna os indivíduos da primeira frente de Pareto (não dominados)."""
+	if not individuos:
+		return []
+
+	valores_ponderados = np.array([ind.fitness.wvalues for ind in individuos])
+	return [individuos[i] for i in _ordenar_nao_dominados(valores_ponderados, 1)[0]]
+
+
+_otimizador_worker: Optional[OtimizadorRotas] = None
+
 
-			if dados["geom"] and isinstance(dados["geom"], LineString):
-				gdf_final.append({
-					"geometry": dados["geom"],
-					"id": i,
-					"bairros_atendidos": ", ".join(dados["bairros"]),
-					"qtd_bairros": len(dados["bairros"]),
-					"distancia": dados["dist"],
-					"origem_idx": orig,
-					"destino_idx": dest,
-				})
+def _inicializar_worker(otimizador: OtimizadorRotas):
+	"""Inicializador dos processos do pool: guarda a cópia do otimizador usada nas avaliações daquele processo."""
+	global _otimizador_worker
+	_criar_tipos_deap()
+	_otimizador_worker = otimizador
 
-		if not gdf_final:
-			return gpd.GeoDataFrame(crs=self.gdf_bairros.crs)
 
-		return gpd.GeoDataFrame(gdf_final, crs=self.gdf_bairros.crs)
+def _avaliar_no_worker(individual):
+	"""Avalia um indivíduo com o otimizador do processo atual (função de módulo para poder ser serializada pelo pool)."""
+	return _otimizador_worker.avaliar(individual)  # type: ignore
 
 
 def plotar_fronteira_pareto(populacao):
@@ -242,7 +472,7 @@ def plotar_fronteira_pareto(populacao):
 	distancias = [val[0] for val in fitness_values]
 	coberturas = [val[1] for val in fitness_values]
 
-	pareto_front = tools.sortNondominated(populacao, len(populacao), first_front_only=True)[0]
+	pareto_front = _fronteira_pareto(populacao)
 
 	pareto_fitness = [ind.fitness.values for ind in pareto_front]
 	pareto_dist = [val[0] for val in pareto_fitness]
@@ -1,8 +1,16 @@
+from typing import Optional
+
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
+from shapely import STRtree
 
 from ..utils import columns
-from ..utils.constants import COLUNAS
+from ..utils.constants import COLUNAS, PYARROW_DISPONIVEL
+
+# Texto das colunas do censo: com o pyarrow instalado, as substituições rodam nos kernels de string do Arrow em vez de objeto a objeto
+_DTYPE_TEXTO = pd.StringDtype("pyarrow", na_value=np.nan) if PYARROW_DISPONIVEL else str
 
 
 def filtrar_setores_por_municipio(setores_gdf: gpd.GeoDataFrame, municipio: str) -> gpd.GeoDataFrame:
@@ -16,7 +24,10 @@ def filtrar_setores_por_municipio(setores_gdf: gpd.GeoDataFrame, municipio: str)
 	Returns:
 		gpd.GeoDataFrame: Um novo GeoDataFrame contendo apenas os setores do município e UF especificados.
 	"""
-	filtro = setores_gdf[columns.NOME_MUNICIPIO].str.upper() == municipio.upper()
+	# Há poucos nomes distintos para muitos setores: só os nomes únicos passam pelo upper() e as linhas são marcadas com isin
+	nomes = setores_gdf[columns.NOME_MUNICIPIO]
+	alvo = municipio.upper()
+	filtro = nomes.isin([nome for nome in nomes.unique() if isinstance(nome, str) and nome.upper() == alvo])
 	setores_filtrados = setores_gdf[filtro].copy()
 	return setores_filtrados
 
@@ -39,12 +50,31 @@ def vincular_setores_com_renda(
 		gpd.GeoDataFrame: Um GeoDataFrame com as informações de renda adicionadas aos setores correspondentes.
 	"""
 	setores_filtrados_gdf[coluna_setor_shp] = setores_filtrados_gdf[coluna_setor_shp].astype(str)
-	renda_df[coluna_setor_csv] = renda_df[coluna_setor_csv].astype(str)
+	# A tabela de renda cobre o país inteiro e é reaproveitada entre execuções; só é convertida na primeira vez
+	if not pd.api.types.is_string_dtype(renda_df[coluna_setor_csv]):
+		renda_df[coluna_setor_csv] = renda_df[coluna_setor_csv].astype(str)
 
 	setores_com_renda = setores_filtrados_gdf.merge(renda_df, left_on=coluna_setor_shp, right_on=coluna_setor_csv, how="left")
 	return setores_com_renda
 
 
+def _limpar_colunas_renda(setores_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+	"""
+	Converte as colunas do censo (texto com "." de milhar e "," decimal) nas colunas numéricas de `COLUNAS`, no próprio GeoDataFrame.
+	"""
+	for col_original, col_novo in COLUNAS.items():
+		if col_original not in setores_gdf.columns:
+			setores_gdf[col_novo] = 0
+		elif isinstance(setores_gdf[col_original].dtype, np.dtype) and setores_gdf[col_original].dtype.kind in "iu":
+			# Colunas que o leitor do CSV já entregou como inteiros não têm separadores a remover; a ida e volta pelo texto é pulada
+			setores_gdf[col_novo] = setores_gdf[col_original]
+		else:
+			sem_milhar = setores_gdf[col_original].astype(_DTYPE_TEXTO).str.replace(".", "", regex=False)
+			setores_gdf[col_original] = sem_milhar
+			setores_gdf[col_novo] = pd.to_numeric(sem_milhar.str.replace(",", ".", regex=False), errors="coerce").fillna(0)
+	return setores_gdf
+
+
 def associar_ibge_bairros(bairros_gdf: gpd.GeoDataFrame, setores_com_renda_gdf: gpd.GeoDataFrame, crs_projetado: str) -> gpd.GeoDataFrame:
 	"""Associa dados de setores censitários (IBGE) aos polígonos de bairros.
 
@@ -57,21 +87,12 @@ def associar_ibge_bairros(bairros_gdf: gpd.GeoDataFrame, setores_com_renda_gdf:
 		gpd.GeoDataFrame: Um GeoDataFrame onde cada linha representa um setor censitário com as informações do bairro ao qual foi associado.
 	"""
 	bairros_proj = bairros_gdf.to_crs(crs_projetado)
-	setores_proj = setores_com_renda_gdf.to_crs(crs_projetado)
-
-	setores_limpos = setores_proj.copy()
-	for col_original, col_novo in COLUNAS.items():
-		if col_original in setores_limpos.columns:
-			setores_limpos[col_original] = setores_limpos[col_original].astype(str)
-			setores_limpos[col_original] = setores_limpos[col_original].str.replace(".", "", regex=False)
-			setores_limpos[col_novo] = pd.to_numeric(setores_limpos[col_original].str.replace(",", ".", regex=False), errors="coerce").fillna(0)
-		else:
-			setores_limpos[col_novo] = 0
+	# to_crs já devolve um GeoDataFrame novo, que é limpo e recebe os centroides no local
+	setores_limpos = _limpar_colunas_renda(setores_com_renda_gdf.to_crs(crs_projetado))
 
-	setores_centroids = setores_limpos.copy()
-	setores_centroids["geometry"] = setores_centroids.geometry.centroid
+	setores_limpos["geometry"] = setores_limpos.geometry.centroid
 
-	join_espacial = gpd.sjoin(setores_centroids, bairros_proj, how="left", predicate="within")
+	join_espacial = gpd.sjoin(setores_limpos, bairros_proj, how="left", predicate="within")
 	return join_espacial[join_espacial["index_right"].notna()]
 
 
@@ -85,28 +106,83 @@ def agregar_renda_por_bairro(bairros_gdf: gpd.GeoDataFrame, setores_com_renda_gd
 
 	Returns:
 		gpd.GeoDataFrame: O GeoDataFrame de bairros com as novas colunas `renda_total_bairro`, `populacao_total_bairro` e `renda_total_bairro`.
+			O índice é o de `bairros_gdf` e `populacao_total_bairro` mantém o tipo de `num_de_moradores` (inteiro, quando o censo o entrega assim),
+			inclusive nos bairros sem setores, que recebem zero.
 	"""
 	bairros_proj = bairros_gdf.to_crs(crs_projetado)
-	join_espacial = associar_ibge_bairros(bairros_gdf, setores_com_renda_gdf, crs_projetado)
-
-	dados_agregados = join_espacial.groupby("index_right").agg(
-		renda_total_bairro=("renda_mensal_media", "sum"), populacao_total_bairro=("num_de_moradores", "sum")
-	)
-
-	bairros_com_renda = bairros_proj.join(dados_agregados).fillna(0).infer_objects(copy=False)
+	setores_limpos = _limpar_colunas_renda(setores_com_renda_gdf.to_crs(crs_projetado))
+
+	# A árvore é montada sobre os centroides dos setores, o conjunto maior, e consultada de uma vez com os polígonos dos bairros, que a
+	# consulta com predicado prepara. Os pares voltam na ordem dos setores, como no sjoin, para que cada soma acumule na mesma ordem
+	centroides = setores_limpos.geometry.centroid.values
+	idx_bairros, idx_setores = STRtree(centroides).query(bairros_proj.geometry.values, predicate="contains")
+	ordem = np.argsort(idx_setores, kind="stable")
+	idx_bairros, idx_setores = idx_bairros[ordem], idx_setores[ordem]
+
+	# As posições dos bairros já são códigos inteiros densos, então cada soma por bairro é um único bincount ponderado sobre os arrays,
+	# sem a ordenação e a montagem de grupos do groupby. Bairros sem setores recebem zero diretamente
+	bairros_com_renda = bairros_proj.copy()
+	for col_setor, col_bairro in (("renda_mensal_media", "renda_total_bairro"), ("num_de_moradores", "populacao_total_bairro")):
+		valores = setores_limpos[col_setor].to_numpy()
+		soma = np.bincount(idx_bairros, weights=valores[idx_setores], minlength=len(bairros_proj))
+		bairros_com_renda[col_bairro] = soma.astype(valores.dtype, copy=False) if valores.dtype.kind in "iu" else soma
+	bairros_com_renda = bairros_com_renda.fillna(0).infer_objects(copy=False)
 
 	if bairros_gdf.crs is None:
 		raise
 	return bairros_com_renda.to_crs(bairros_gdf.crs)
 
 
-def calcular_fluxos_od(bairros_gdf: gpd.GeoDataFrame, origem_gdf: gpd.GeoDataFrame, destino_gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+def pontos_dentro_de_poligonos(arvore_poligonos: STRtree, pontos: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+	"""Encontra os pares (ponto, polígono) em que o ponto está dentro do polígono.
+
+	Equivale a `arvore_poligonos.query(pontos, predicate="within")`, mas testa os candidatos da consulta por envelope com `contains` sobre os
+	polígonos preparados. A consulta com predicado prepara a geometria de entrada (os pontos), que não se beneficia disso; preparar os
+	polígonos monta o índice das suas arestas uma única vez e o reaproveita em todas as consultas seguintes sobre a mesma árvore.
+
+	Args:
+		arvore_poligonos (STRtree): Índice espacial dos polígonos. As geometrias da árvore são preparadas no local.
+		pontos (np.ndarray): Array de geometrias de pontos, no mesmo CRS dos polígonos.
+
+	Returns:
+		tuple[np.ndarray, np.ndarray]: As posições dos pontos e as posições dos polígonos que os contêm, na mesma ordem da consulta com predicado.
+	"""
+	poligonos = arvore_poligonos.geometries
+	shapely.prepare(poligonos)
+	idx_pontos, idx_poligonos = arvore_poligonos.query(pontos)
+	dentro = shapely.contains(poligonos[idx_poligonos], pontos[idx_pontos])
+	return idx_pontos[dentro], idx_poligonos[dentro]
+
+
+def _contar_pontos_por_bairro(arvore_bairros: STRtree, pontos: np.ndarray, contagem: Optional[np.ndarray], qtd_bairros: int) -> np.ndarray:
+	"""
+	Soma, para cada bairro (posição na árvore), a contagem dos pontos contidos nele. Sem `contagem`, cada par (ponto, bairro) vale um.
+	"""
+	idx_pontos, idx_bairros = pontos_dentro_de_poligonos(arvore_bairros, pontos)
+	if contagem is None:
+		return np.bincount(idx_bairros, minlength=qtd_bairros)
+	return np.bincount(idx_bairros, weights=np.asarray(contagem)[idx_pontos], minlength=qtd_bairros).round().astype(np.int64)
+
+
+def calcular_fluxos_od(
+	bairros_gdf: gpd.GeoDataFrame,
+	origem_gdf: gpd.GeoDataFrame,
+	destino_gdf: gpd.GeoDataFrame,
+	arvore_bairros: Optional[STRtree] = None,
+	contagem_origem: Optional[np.ndarray] = None,
+	contagem_destino: Optional[np.ndarray] = None,
+) -> gpd.GeoDataFrame:
 	"""Calcula o número total de pontos de origem e destino por bairro.
 
 	Args:
 		bairros_gdf (gpd.GeoDataFrame): GeoDataFrame com os polígonos dos bairros.
 		origem_gdf (gpd.GeoDataFrame): GeoDataFrame de pontos representando as origens.
 		destino_gdf (gpd.GeoDataFrame): GeoDataFrame de pontos representando os destinos.
+		arvore_bairros (Optional[STRtree]): Índice espacial já construído sobre as geometrias de `bairros_gdf`, na mesma ordem e CRS. Se
+			omitido, é construído aqui.
+		contagem_origem (Optional[np.ndarray]): Quantas viagens cada ponto de `origem_gdf` representa, quando os pontos repetidos já foram
+			agrupados. Se omitido, cada ponto conta uma vez.
+		contagem_destino (Optional[np.ndarray]): O mesmo que `contagem_origem`, para `destino_gdf`.
 
 	Returns:
 		gpd.GeoDataFrame: O GeoDataFrame de bairros com as novas colunas `n_origens`, `n_destinos` e `fluxo_total`.
@@ -119,16 +195,13 @@ def calcular_fluxos_od(bairros_gdf: gpd.GeoDataFrame, origem_gdf: gpd.GeoDataFra
 	if bairros_result.crs != destino_gdf.crs:
 		destino_gdf = destino_gdf.to_crs(bairros_result.crs)
 
-	pontos_origem = gpd.sjoin(origem_gdf, bairros_result, how="left", predicate="within")
-	pontos_destino = gpd.sjoin(destino_gdf, bairros_result, how="left", predicate="within")
-
-	qtd_origem = pontos_origem.groupby("index_right").size()
-	qtd_destino = pontos_destino.groupby("index_right").size()
+	if arvore_bairros is None:
+		arvore_bairros = STRtree(bairros_result.geometry.values)
 
 	colunas_necessarias = [columns.ORIGEM, columns.DESTINO]
 
-	bairros_result[columns.ORIGEM] = bairros_result.index.map(qtd_origem).fillna(0).astype(int)
-	bairros_result[columns.DESTINO] = bairros_result.index.map(qtd_destino).fillna(0).astype(int)
+	bairros_result[columns.ORIGEM] = _contar_pontos_por_bairro(arvore_bairros, origem_gdf.geometry.values, contagem_origem, len(bairros_result))
+	bairros_result[columns.DESTINO] = _contar_pontos_por_bairro(arvore_bairros, destino_gdf.geometry.values, contagem_destino, len(bairros_result))
 
 	if set(colunas_necessarias).issubset(bairros_result.columns):
 		bairros_result[columns.FLUXO] = bairros_result[columns.ORIGEM] + bairros_result[columns.DESTINO]
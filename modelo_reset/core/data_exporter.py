@@ -3,6 +3,8 @@ from typing import Optional
 
 import geopandas as gpd
 
+from ..utils import constants
+
 
 def garantir_diretorio(caminho_arquivo: str):
 	"""Cria o diretório pai se ele não existir."""
@@ -26,19 +28,20 @@ def exportar_geodataframe(gdf: gpd.GeoDataFrame, caminho_saida: str, formato: st
 
 	garantir_diretorio(caminho_saida)
 
-	# Trabalha numa cópia para não alterar o dado original na memória
-	gdf_export = gdf.copy()
+	# Conversão de CRS (KML e GeoJSON preferem WGS84/EPSG:4326). `to_crs` já devolve um novo GeoDataFrame, então o original nunca é
+	# alterado e, quando não há conversão, ele é gravado diretamente, sem cópia
+	crs_destino = crs_saida or ("EPSG:4326" if formato in ["kml", "geojson"] else None)
 
-	# Conversão de CRS (KML e GeoJSON preferem WGS84/EPSG:4326)
-	if crs_saida:
-		gdf_export = gdf_export.to_crs(crs_saida)
-	elif formato in ["kml", "geojson"] and gdf_export.crs != "EPSG:4326":
-		gdf_export = gdf_export.to_crs("EPSG:4326")
+	if crs_destino and gdf.crs != crs_destino:
+		gdf_export = gdf.to_crs(crs_destino)
+	else:
+		gdf_export = gdf
 
 	drivers = {"shapefile": "ESRI Shapefile", "geojson": "GeoJSON", "gpkg": "GPKG"}
 
 	try:
-		gdf_export.to_file(caminho_saida, driver=drivers[formato])
+		# Gravação em lote pelo GDAL via pyogrio; com o pyarrow instalado, os dados são repassados em blocos Arrow
+		gdf_export.to_file(caminho_saida, driver=drivers[formato], engine="pyogrio", use_arrow=constants.PYARROW_DISPONIVEL)
 
 	except Exception as e:
 		raise ValueError(e)
@@ -1,22 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import geopandas as gpd
 import pandas as pd
-from pyogrio import list_layers
+from pyogrio import list_layers, read_dataframe
+from shapely.geometry.base import BaseGeometry
 
 from ..utils import constants
 
+# Com o pyarrow instalado, o pyogrio entrega as feições ao GeoPandas em lotes colunares do GDAL em vez de uma a uma, e os CSVs são lidos
+# pelo leitor do Arrow, que divide o arquivo entre várias threads
+_MOTOR_CSV = "pyarrow" if constants.PYARROW_DISPONIVEL else "c"
+
+# Número máximo de camadas de um KML lidas ao mesmo tempo
+_MAX_LEITURAS_KML_PARALELAS = 8
+
 
-def ler_shapefile(path: str, target_crs: str, original_crs: str = constants.CRS_GEOGRAFICO) -> gpd.GeoDataFrame:
+def ler_shapefile(
+	path: str,
+	target_crs: str,
+	original_crs: str = constants.CRS_GEOGRAFICO,
+	bbox: Optional[tuple[float, float, float, float]] = None,
+	mask: Optional[BaseGeometry] = None,
+) -> gpd.GeoDataFrame:
 	"""Lê um shapefile, define seu CRS se ausente e o converte para um CRS de destino.
 
 	Args:
 		path (str): O caminho para o arquivo shapefile.
 		target_crs (str): O CRS de destino para o qual o GeoDataFrame será convertido.
 		original_crs (str, optional): O código EPSG a ser assumido se o arquivo não tiver um CRS definido. Padrão é 4326.
+		bbox (Optional[tuple[float, float, float, float]], optional): Retângulo (xmin, ymin, xmax, ymax), no CRS do arquivo, que limita as
+			feições lidas. O filtro é aplicado pelo GDAL, então as feições de fora não chegam a ser carregadas. Padrão é None (arquivo todo).
+		mask (Optional[BaseGeometry], optional): Geometria, no CRS do arquivo, com o mesmo papel de `bbox` para recortes não retangulares
+			(por exemplo, o limite de um município). Não pode ser usada junto com `bbox`. Padrão é None.
 
 	Returns:
 		gpd.GeoDataFrame: Um GeoDataFrame lido a partir do arquivo e convertido para o CRS de destino.
 	"""
-	shapefile = gpd.read_file(path, ignore_geometry=False)
+	shapefile = gpd.read_file(path, bbox=bbox, mask=mask, engine="pyogrio", use_arrow=constants.PYARROW_DISPONIVEL)
 	if shapefile.crs is None:
 		shapefile = shapefile.set_crs(crs=original_crs, inplace=True)
 
@@ -34,22 +55,28 @@ def ler_residencias_csv(path: str, crs: str = constants.CRS_GEOGRAFICO) -> gpd.G
 	Returns:
 		gpd.GeoDataFrame: Um GeoDataFrame com a geometria de pontos criada a partir das coordenadas do CSV.
 	"""
-	df = pd.read_csv(path)
-	geometria = gpd.points_from_xy(df["longitude"], df["latitude"])
-	residencias_gdf = gpd.GeoDataFrame(df, geometry=geometria, crs=crs)
+	# As coordenadas já são lidas como float64 pelo parser em C, e os pontos saem direto dos arrays, numa única chamada ao GEOS
+	df = pd.read_csv(path, dtype={"longitude": "float64", "latitude": "float64"})
+	geometria = gpd.points_from_xy(df["longitude"].to_numpy(), df["latitude"].to_numpy(), crs=crs)
+	residencias_gdf = gpd.GeoDataFrame(df, geometry=geometria)
 	return residencias_gdf
 
 
 def ler_od_csv(path: str) -> pd.DataFrame:
-	"""Lê um CSV de dados de origem-destino.
+	"""Lê um arquivo de dados de origem-destino, em CSV ou Parquet.
+
+	Arquivos com extensão `.parquet` são lidos como Parquet (requer pyarrow), que é colunar e tipado e por isso bem menor e mais rápido de
+	ler que o CSV equivalente.
 
 	Args:
-		path (str): O caminho para o arquivo CSV de origem-destino.
+		path (str): O caminho para o arquivo CSV ou Parquet de origem-destino.
 
 	Returns:
 		pd.DataFrame: Um DataFrame do pandas com os dados lidos.
 	"""
-	return pd.read_csv(path)
+	if str(path).lower().endswith(".parquet"):
+		return pd.read_parquet(path)
+	return pd.read_csv(path, engine=_MOTOR_CSV)
 
 
 def ler_renda_csv(path: str, separador: str = ",", encoding: str = "latin-1") -> pd.DataFrame:
@@ -63,7 +90,7 @@ def ler_renda_csv(path: str, separador: str = ",", encoding: str = "latin-1") ->
 	Returns:
 		pd.DataFrame: Um DataFrame do pandas com os dados de renda.
 	"""
-	return pd.read_csv(path, sep=separador, encoding=encoding)
+	return pd.read_csv(path, sep=separador, encoding=encoding, engine=_MOTOR_CSV)
 
 
 def ler_kml(path: str, target_crs: str) -> gpd.GeoDataFrame:
@@ -76,20 +103,26 @@ def ler_kml(path: str, target_crs: str) -> gpd.GeoDataFrame:
 	Returns:
 		gpd.GeoDataFrame: Um único GeoDataFrame contendo os dados de todas as camadas do KML, convertido para o CRS de destino. Retorna um GeoDataFrame vazio em caso de erro.
 	"""
-	gdfs: list[gpd.GeoDataFrame] = []
 	try:
+		# Uma única abertura do arquivo lista as camadas; um KML sem camadas retorna aqui, sem chegar a ler nenhuma
 		layers = list_layers(path)
-		for layer_info in layers:
-			layer_name = layer_info[0]
-			gdf = gpd.read_file(path, driver="KML", layer=layer_name)
+		if len(layers) == 0:
+			print("Nenhuma camada encontrada no arquivo KML.")
+			return gpd.GeoDataFrame()
+
+		def ler_camada(layer_name: str) -> gpd.GeoDataFrame:
+			gdf = read_dataframe(path, layer=layer_name, use_arrow=constants.PYARROW_DISPONIVEL)
 			gdf["camada"] = layer_name
-			gdfs.append(gdf)
+			return gdf
 
-		if not gdfs:
-			raise ValueError("Nenhuma camada encontrada no arquivo KML.")
+		# O pyogrio libera o GIL durante a leitura no GDAL, então as camadas podem ser lidas em paralelo
+		nomes_camadas = [layer_info[0] for layer_info in layers]
+		with ThreadPoolExecutor(max_workers=min(_MAX_LEITURAS_KML_PARALELAS, len(nomes_camadas))) as executor:
+			gdfs = list(executor.map(ler_camada, nomes_camadas))
 
 		concatenated_gdf = gpd.GeoDataFrame(pd.concat(gdfs, ignore_index=True), crs=constants.CRS_GEOGRAFICO)
 		return concatenated_gdf.to_crs(target_crs)
 
-	except Exception:
+	except Exception as e:
+		print(f"Erro ao processar KML: {e}")
 		return gpd.GeoDataFrame()
@@ -1,12 +1,109 @@
+import io
 import os
+import shutil
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import IO, Iterator, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 
 from ..utils import constants
 
+# Tamanho dos blocos lidos da resposta HTTP e limite a partir do qual o .zip baixado deixa a memória e vai para um arquivo temporário
+_TAMANHO_BLOCO_DOWNLOAD = 1 << 20
+_LIMITE_ZIP_EM_MEMORIA = 512 * (1 << 20)
+
+# Membros do .zip descompactados ao mesmo tempo; o zlib libera o GIL, então .shp, .dbf e .shx são extraídos em paralelo
+_MAX_EXTRACOES_PARALELAS = 4
+
+# Prefixo do diretório provisório de extração; um que tenha sobrado de uma execução interrompida é ignorado nas buscas por arquivos
+_PREFIXO_PROVISORIO = ".extraindo_"
+
+# Tempo máximo, em segundos, para abrir a conexão e para esperar cada bloco da resposta
+_TIMEOUT_DOWNLOAD = (5, 30)
+
+# Sessão compartilhada pelos downloads: as conexões com os servidores do IBGE ficam no pool e são reaproveitadas entre arquivos, sem um novo
+# handshake TCP/TLS por download, e falhas transitórias de conexão são repetidas algumas vezes antes de desistir
+_SESSAO = requests.Session()
+_ADAPTADOR = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=3, backoff_factor=0.3))
+_SESSAO.mount("https://", _ADAPTADOR)
+_SESSAO.mount("http://", _ADAPTADOR)
+
+
+def _criar_buffer_zip(tamanho_anunciado: Optional[str]) -> IO[bytes]:
+	"""
+	Cria o buffer que recebe o .zip baixado, em memória ou num arquivo temporário anônimo.
+
+	O buffer fica em memória quando o servidor informa um tamanho até `_LIMITE_ZIP_EM_MEMORIA`. A escolha é feita pelo Content-Length antes
+	do download porque o `zipfile` só aceita um `SpooledTemporaryFile` a partir do Python 3.11.
+	"""
+	try:
+		tamanho = int(tamanho_anunciado)
+	except (TypeError, ValueError):
+		return tempfile.TemporaryFile()
+	return io.BytesIO() if tamanho <= _LIMITE_ZIP_EM_MEMORIA else tempfile.TemporaryFile()
+
+
+def _extrair_zip(zip_ref: zipfile.ZipFile, diretorio_saida: str) -> None:
+	"""
+	Extrai os arquivos do .zip em `diretorio_saida` em blocos de `_TAMANHO_BLOCO_DOWNLOAD`, maiores que os do `extractall`.
+
+	Membros cujo caminho sairia do diretório de saída são ignorados, como o `extractall` também faz.
+	"""
+	raiz = os.path.realpath(diretorio_saida)
+	membros = []
+	for info in zip_ref.infolist():
+		destino = os.path.realpath(os.path.join(raiz, info.filename))
+		if os.path.commonpath([raiz, destino]) != raiz:
+			continue
+		if info.is_dir():
+			os.makedirs(destino, exist_ok=True)
+		else:
+			os.makedirs(os.path.dirname(destino), exist_ok=True)
+			membros.append((info, destino))
+
+	def extrair_membro(membro: tuple[zipfile.ZipInfo, str]) -> None:
+		info, destino = membro
+		with zip_ref.open(info) as origem, open(destino, "wb") as saida:
+			shutil.copyfileobj(origem, saida, _TAMANHO_BLOCO_DOWNLOAD)
+
+	if not membros:
+		return
+	with ThreadPoolExecutor(max_workers=min(_MAX_EXTRACOES_PARALELAS, len(membros))) as executor:
+		# list() propaga para cá a exceção de qualquer membro que falhar
+		list(executor.map(extrair_membro, membros))
+
+
+def _mover_arquivos(origem: str, destino: str, ultimo: Optional[str] = None) -> None:
+	"""
+	Move os arquivos de `origem` para `destino`, mantendo os subdiretórios.
+
+	Cada arquivo é movido com `os.replace`, que é atômico no mesmo sistema de arquivos e substitui uma versão anterior. O arquivo `ultimo`
+	(caminho relativo a `origem`), que as verificações de download já feito procuram, só é movido depois de todos os outros.
+	"""
+	caminhos = []
+	for raiz, _, arquivos in os.walk(origem):
+		relativo = os.path.relpath(raiz, origem)
+		os.makedirs(os.path.join(destino, relativo), exist_ok=True)
+		caminhos.extend(os.path.normpath(os.path.join(relativo, arquivo)) for arquivo in arquivos)
+
+	caminhos.sort(key=lambda caminho: caminho == ultimo)
+	for caminho in caminhos:
+		os.replace(os.path.join(origem, caminho), os.path.join(destino, caminho))
+
+
+def _buscar_arquivos(diretorio: str, padrao: str) -> Iterator[Path]:
+	"""
+	Busca recursivamente os arquivos de `diretorio` que casam com `padrao`, fora dos diretórios provisórios de extração.
+	"""
+	for arquivo in Path(diretorio).rglob(padrao):
+		if not any(parte.startswith(_PREFIXO_PROVISORIO) for parte in arquivo.relative_to(diretorio).parts):
+			yield arquivo
+
 
 def _baixar_e_descompactar_zip(url: str, diretorio_saida: str, uf: Optional[str] = None) -> Optional[str]:
 	"""Função auxiliar para baixar e descompactar um arquivo .zip.
@@ -19,30 +116,36 @@ def _baixar_e_descompactar_zip(url: str, diretorio_saida: str, uf: Optional[str]
 	Returns:
 		Optional[str]: O caminho para o diretório onde os arquivos foram extraídos ou None em caso de falha.
 	"""
+	# Arquivo cuja presença indica que o .zip já foi baixado e extraído
+	sentinela = uf + constants.SHAPEFILE_NAME if uf else constants.CSV_NAME
 	try:
 		if uf:
 			diretorio_saida = os.path.join(diretorio_saida, uf)
 
-			if os.path.exists(os.path.join(diretorio_saida, uf + constants.SHAPEFILE_NAME)):
+			if os.path.exists(os.path.join(diretorio_saida, sentinela)):
 				return diretorio_saida
 
 		Path(diretorio_saida).mkdir(parents=True, exist_ok=True)
 
-		nome_arquivo_zip = os.path.join(diretorio_saida, Path(url).name)
-
 		if os.path.exists(os.path.join(diretorio_saida, constants.CSV_NAME)):
 			return diretorio_saida
 
-		with requests.get(url, stream=True) as r:
+		# O .zip é mantido em memória e extraído de lá, sem ser gravado e apagado do disco; só os downloads maiores que o limite, ou sem
+		# tamanho informado, vão para um arquivo temporário
+		with _SESSAO.get(url, stream=True, timeout=_TIMEOUT_DOWNLOAD) as r, _criar_buffer_zip(r.headers.get("Content-Length")) as arquivo_zip:
 			r.raise_for_status()
-			with open(nome_arquivo_zip, "wb") as f:
-				for chunk in r.iter_content(chunk_size=8192):
-					f.write(chunk)
-
-		with zipfile.ZipFile(nome_arquivo_zip, "r") as zip_ref:
-			zip_ref.extractall(diretorio_saida)
-
-		os.remove(nome_arquivo_zip)
+			for chunk in r.iter_content(chunk_size=_TAMANHO_BLOCO_DOWNLOAD):
+				arquivo_zip.write(chunk)
+
+			# A extração vai para um diretório provisório dentro do de saída e os arquivos só são movidos para o lugar no fim, com a sentinela
+			# por último: um download interrompido não deixa um .shp ou .csv pela metade que as verificações acima tomariam como já baixado
+			arquivo_zip.seek(0)
+			with (
+				zipfile.ZipFile(arquivo_zip, "r") as zip_ref,
+				tempfile.TemporaryDirectory(dir=diretorio_saida, prefix=_PREFIXO_PROVISORIO) as provisorio,
+			):
+				_extrair_zip(zip_ref, provisorio)
+				_mover_arquivos(provisorio, diretorio_saida, ultimo=sentinela)
 
 		return diretorio_saida
 
@@ -70,7 +173,7 @@ def baixar_malha_municipal(diretorio_saida: str, uf: str = "MG", ano: int = 2022
 	diretorio_extraido = _baixar_e_descompactar_zip(url, diretorio_saida, uf)
 
 	if diretorio_extraido:
-		for arquivo in Path(diretorio_extraido).rglob("*.shp"):
+		for arquivo in _buscar_arquivos(diretorio_extraido, "*.shp"):
 			return str(arquivo)
 
 	return None
@@ -91,11 +194,11 @@ def baixar_dados_censo_renda(diretorio_saida: str, ano: int = 2022) -> Optional[
 	diretorio_extraido = _baixar_e_descompactar_zip(url, diretorio_saida)
 
 	if diretorio_extraido:
-		for arquivo in Path(diretorio_extraido).rglob("*.csv"):
+		for arquivo in _buscar_arquivos(diretorio_extraido, "*.csv"):
 			if "renda" in arquivo.name.lower() or "domicilio" in arquivo.name.lower():
 				return str(arquivo)
 
-		primeiro_csv = next(Path(diretorio_extraido).rglob("*.csv"), None)
+		primeiro_csv = next(_buscar_arquivos(diretorio_extraido, "*.csv"), None)
 		if primeiro_csv:
 			return str(primeiro_csv)
 
@@ -2,115 +2,120 @@ from typing import Literal, Optional
 
 import geopandas as gpd
 import networkx as nx
-from shapely.geometry import LineString, MultiLineString, MultiPoint, Point
-from shapely.ops import nearest_points
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from shapely import STRtree
+from shapely.geometry import LineString, Point
 
 from ..utils import columns, constants
 
 
-def filtrar_vias_por_bairros(gdf_vias: gpd.GeoDataFrame, gdf_bairros: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+def filtrar_vias_por_bairros(gdf_vias: gpd.GeoDataFrame, gdf_bairros: gpd.GeoDataFrame, arvore_bairros: Optional[STRtree] = None) -> gpd.GeoDataFrame:
 	"""
 	Filtra o GeoDataFrame de vias para incluir apenas aquelas que intersectam a área dos bairros.
+
+	`arvore_bairros` é um índice espacial já construído sobre as geometrias de `gdf_bairros`; se omitido, é construído aqui. As vias são
+	apenas filtradas, sem receber os atributos dos bairros.
 	"""
-	vias_filtradas = gpd.sjoin(gdf_vias, gdf_bairros, how="inner", predicate="intersects")
+	if arvore_bairros is None:
+		arvore_bairros = STRtree(gdf_bairros.geometry.values)
+
+	idx_vias, _ = arvore_bairros.query(gdf_vias.geometry.values, predicate="intersects")
+	vias_filtradas = gdf_vias.iloc[np.unique(idx_vias)]
 	vias_filtradas = vias_filtradas.drop_duplicates(subset="ID")
 	return vias_filtradas
 
 
-def calcular_peso_atrativo(ponto_articulacao: Point, ponto_aresta: Point, centroid_bairro: Point, peso_original: float, tipo_bairro: str = "Nenhum"):
+def calcular_pesos_atrativos(
+	distancias_articulacao: np.ndarray,
+	distancias_polo: np.ndarray,
+	raios_influencia: np.ndarray,
+	max_descontos: np.ndarray,
+	pesos_originais: np.ndarray,
+) -> np.ndarray:
 	"""
-	Calcula o peso da aresta aplicando descontos cumulativos baseados na proximidade de pontos de articulação e do centro do bairro, com preferência por tipo de bairro.
-	"""
-	distancia_articulacao = ponto_articulacao.distance(ponto_aresta)
-	desconto_articulacao = _desconto_ponto_articulacao(distancia_articulacao)
-
-	if tipo_bairro == "Emergente":
-		raio_influencia = 2000
-		max_desconto = 0.5
-	elif tipo_bairro == "Consolidado":
-		raio_influencia = 1500
-		max_desconto = 0.3
-	elif tipo_bairro == "Planejado":
-		raio_influencia = 1000
-		max_desconto = 0.1
-	else:
-		raio_influencia = 1
-		max_desconto = 0.0
+	Calcula de uma só vez o peso de todos os segmentos a partir das distâncias já conhecidas.
 
-	distancia_polo = centroid_bairro.distance(ponto_aresta)
-	desconto_polo = _desconto_polo(distancia_polo, raio_influencia, max_desconto)
+	Os descontos são cumulativos e baseados na proximidade de pontos de articulação e do centro do bairro, com preferência por tipo de
+	bairro. Todos os argumentos são arrays do mesmo tamanho (ou escalares), com um elemento por segmento.
+	"""
+	desconto_articulacao = _desconto_ponto_articulacao(distancias_articulacao)
+	desconto_polo = _desconto_polo(distancias_polo, raios_influencia, max_descontos)
 
 	desconto_total = desconto_articulacao + desconto_polo - (desconto_articulacao * desconto_polo)
 
-	peso_final = peso_original * (1 - desconto_total)
-	return max(peso_final, 0.1)
+	peso_final = pesos_originais * (1 - desconto_total)
+	return np.maximum(peso_final, 0.1)
+
+
+# Código inteiro de cada tipo de polo (0 = sem polo) e, indexados por esse código, o raio de influência e o desconto máximo aplicados ao
+# redor do centroide do bairro
+_CODIGOS_POLO = {"Emergente": 1, "Consolidado": 2, "Planejado": 3}
+_RAIOS_INFLUENCIA = np.array([1, 2000, 1500, 1000], dtype=np.float64)
+_MAX_DESCONTOS = np.array([0.0, 0.5, 0.3, 0.1], dtype=np.float64)
 
 
-def _desconto_ponto_articulacao(distancia: float) -> float:
+def _codificar_polos(tipos_bairros: pd.Series) -> np.ndarray:
+	"""
+	Converte os tipos de polo dos bairros nos códigos inteiros usados para indexar `_RAIOS_INFLUENCIA` e `_MAX_DESCONTOS`.
+	"""
+	# A coluna pode ser categórica; como objeto, os tipos sem código viram NaN no map em vez de exigir uma categoria para o 0
+	return tipos_bairros.astype(object).map(_CODIGOS_POLO).fillna(0).to_numpy(dtype=np.int8)
+
+
+def _desconto_ponto_articulacao(distancia: np.ndarray) -> np.ndarray:
 	"""
 	Calcula um peso atrativo. Arestas mais próximas do ponto de articulação terão seu peso reduzido, atraindo o caminho mais curto.
 	"""
-	fator_articulacao = max(0, 1 - (distancia / 1000))
+	fator_articulacao = np.maximum(0, 1 - (distancia / 1000))
 
 	return fator_articulacao * 0.4
 
 
-def _desconto_polo(distancia: float, raio_influencia: int, max_desconto: float) -> float:
+def _desconto_polo(distancia: np.ndarray, raio_influencia: np.ndarray, max_desconto: np.ndarray) -> np.ndarray:
 	"""
 	Calcula o peso atrativo com o centroid do bairro.
 	"""
-	fator_polo = max(0, 1 - (distancia / raio_influencia))
+	fator_polo = np.maximum(0, 1 - (distancia / raio_influencia))
 	return fator_polo * max_desconto
 
 
 def criacao_arestas(
-	grafo: nx.MultiDiGraph,
-	linha: LineString,
-	pontos_articulacao: MultiPoint,
-	centroid_bairros: MultiPoint,
-	lista_tipos_bairros: list,
-	via_id_principal: int,
-	direcao: int,
-):
+	coordenadas_linha: np.ndarray, pesos_originais: np.ndarray, pesos_finais: np.ndarray, via_id_principal: int, direcao: int
+) -> list[tuple[tuple, tuple, dict]]:
 	"""
-	Função responsável por criar as arestas.
+	Função responsável por criar as arestas, retornadas como tuplas (origem, destino, atributos) prontas para `grafo.add_edges_from`.
+
+	`coordenadas_linha` é o array (N, 2) de vértices da linha. Os arrays `pesos_originais` e `pesos_finais` têm um elemento por segmento da
+	linha e são pré-calculados em lote por `criar_grafo_ponderado`.
 	"""
-	coordenadas = list(linha.coords)
+	coordenadas = list(map(tuple, coordenadas_linha.tolist()))
+	arestas = []
 
 	for i in range(len(coordenadas) - 1):
 		ponto_inicio_segmento = coordenadas[i]
 		ponto_fim_segmento = coordenadas[i + 1]
 
-		segmento = LineString([ponto_inicio_segmento, ponto_fim_segmento])
-		peso_original_segmento = segmento.length
+		peso_original_segmento = float(pesos_originais[i])
 
 		if peso_original_segmento == 0:
 			continue
 
-		ponto_medio_segmento = segmento.interpolate(0.5, normalized=True)
-
-		dists_pontos_articulacao = [p.distance(ponto_medio_segmento) for p in pontos_articulacao.geoms]
-		idx_ponto_articulacao_mais_proximo = dists_pontos_articulacao.index(min(dists_pontos_articulacao))
-		dists_bairro = [p.distance(ponto_medio_segmento) for p in centroid_bairros.geoms]
-		idx_bairro_mais_proximo = dists_bairro.index(min(dists_bairro))
-
-		centroid_mais_proximo = centroid_bairros.geoms[idx_bairro_mais_proximo]
-		ponto_articulacao_mais_proximo = pontos_articulacao.geoms[idx_ponto_articulacao_mais_proximo]
-		tipo_bairro_atual = lista_tipos_bairros[idx_bairro_mais_proximo]
-
-		peso_final_segmento = calcular_peso_atrativo(
-			ponto_articulacao_mais_proximo, ponto_medio_segmento, centroid_mais_proximo, peso_original_segmento, tipo_bairro=tipo_bairro_atual
-		)
-
-		atributos = {"weight": peso_final_segmento, "original_weight": peso_original_segmento, "via_id": via_id_principal}
+		atributos = {"weight": float(pesos_finais[i]), "original_weight": peso_original_segmento, "via_id": via_id_principal}
 
 		if direcao == 0:
-			grafo.add_edge(ponto_inicio_segmento, ponto_fim_segmento, **atributos)
-			grafo.add_edge(ponto_fim_segmento, ponto_inicio_segmento, **atributos)
+			arestas.append((ponto_inicio_segmento, ponto_fim_segmento, atributos))
+			arestas.append((ponto_fim_segmento, ponto_inicio_segmento, atributos))
 		elif direcao == 1:
-			grafo.add_edge(ponto_inicio_segmento, ponto_fim_segmento, **atributos)
+			arestas.append((ponto_inicio_segmento, ponto_fim_segmento, atributos))
 		elif direcao == -1:
-			grafo.add_edge(ponto_fim_segmento, ponto_inicio_segmento, **atributos)
+			arestas.append((ponto_fim_segmento, ponto_inicio_segmento, atributos))
+
+	return arestas
 
 
 def criar_grafo_ponderado(gdf_vias: gpd.GeoDataFrame, gdf_pontos_articulacao: gpd.GeoDataFrame, gdf_bairros: gpd.GeoDataFrame) -> nx.MultiDiGraph:
@@ -120,65 +125,162 @@ def criar_grafo_ponderado(gdf_vias: gpd.GeoDataFrame, gdf_pontos_articulacao: gp
 	Esta versão "explode" cada LineString em seus segmentos constituintes,
 	criando uma aresta para CADA segmento.
 
-	A ponderação de atratividade é aplicada individualmente a cada segmento.
+	A ponderação de atratividade é aplicada individualmente a cada segmento. O ponto de articulação e o centroide de bairro mais próximos de
+	cada segmento são buscados de uma só vez, para todos os segmentos da rede, com uma STRtree.
 	"""
 	grafo = nx.MultiDiGraph()
 
 	if gdf_pontos_articulacao.empty:
 		raise ValueError("O GeoDataFrame de pontos de articulação está vazio.")
 
-	pontos_articulacao = MultiPoint(gdf_pontos_articulacao.geometry.union_all())  # type: ignore
+	geoms_articulacao = shapely.get_parts(gdf_pontos_articulacao.geometry.values)
 	# bairros_relevantes = gdf_bairros[gdf_bairros[columns.POLO].isin(["Emergente", "Consolidado"])]
-	centroids_bairros = MultiPoint(gdf_bairros.centroid.geometry.union_all())  # type: ignore
-	lista_tipos_bairros = gdf_bairros[columns.POLO].tolist()
+	# Um centroide por linha de gdf_bairros, na mesma ordem: o índice devolvido pela STRtree também indexa codigos_polo (a união das
+	# geometrias reordenaria e deduplicaria os pontos)
+	geoms_centroids = shapely.centroid(gdf_bairros.geometry.values)
+	codigos_polo = _codificar_polos(gdf_bairros[columns.POLO])
+
+	# Partes (LineStrings) de todas as vias; uma via só é usada se for linha e se todas as suas partes forem válidas e não vazias
+	geometrias_vias = gdf_vias.geometry.values
+	eh_linha = np.isin(shapely.get_type_id(geometrias_vias), (shapely.GeometryType.LINESTRING, shapely.GeometryType.MULTILINESTRING))
+	partes, idx_via_parte = shapely.get_parts(geometrias_vias, return_index=True)
+	partes_invalidas = ~shapely.is_valid(partes) | shapely.is_empty(partes)
+	vias_validas = (
+		eh_linha
+		& (np.bincount(idx_via_parte, minlength=len(gdf_vias)) > 0)
+		& (np.bincount(idx_via_parte[partes_invalidas], minlength=len(gdf_vias)) == 0)
+	)
+
+	if not vias_validas.any():
+		return grafo
+
+	direcoes_vias = gdf_vias["DIR"].to_numpy()
+	ids_vias = gdf_vias["ID"].to_numpy()
+
+	if pd.api.types.infer_dtype(direcoes_vias[vias_validas]) != "integer" or pd.api.types.infer_dtype(ids_vias[vias_validas]) != "integer":
+		raise ValueError("Erro na direção ou no id da via")
+
+	mascara_partes = vias_validas[idx_via_parte]
+	linhas = partes[mascara_partes]
+	idx_via_linha = idx_via_parte[mascara_partes]
+
+	# Segmentos de todas as linhas, na ordem em que serão percorridos
+	coordenadas, idx_linha_coord = shapely.get_coordinates(linhas, return_index=True)
+	mesma_linha = idx_linha_coord[1:] == idx_linha_coord[:-1]
+	inicios = coordenadas[:-1][mesma_linha]
+	fins = coordenadas[1:][mesma_linha]
+	pesos_originais = np.linalg.norm(fins - inicios, axis=1)
+	pontos_medios = shapely.points((inicios + fins) / 2)
+
+	idx_pontos_articulacao = STRtree(geoms_articulacao).nearest(pontos_medios)
+	idx_bairros = STRtree(geoms_centroids).nearest(pontos_medios)
+
+	codigos_segmentos = codigos_polo[idx_bairros]
+	pesos_finais = calcular_pesos_atrativos(
+		shapely.distance(geoms_articulacao[idx_pontos_articulacao], pontos_medios),
+		shapely.distance(geoms_centroids[idx_bairros], pontos_medios),
+		_RAIOS_INFLUENCIA[codigos_segmentos],
+		_MAX_DESCONTOS[codigos_segmentos],
+		pesos_originais,
+	)
+
+	limites_coordenadas = np.concatenate(([0], np.cumsum(np.bincount(idx_linha_coord, minlength=len(linhas)))))
+
+	arestas = []
+	inicio = 0
+	for i, idx_via in enumerate(idx_via_linha.tolist()):
+		coordenadas_linha = coordenadas[limites_coordenadas[i] : limites_coordenadas[i + 1]]
+		fim = inicio + len(coordenadas_linha) - 1
+		arestas.extend(
+			criacao_arestas(
+				coordenadas_linha, pesos_originais[inicio:fim], pesos_finais[inicio:fim], int(ids_vias[idx_via]), int(direcoes_vias[idx_via])
+			)
+		)
+		inicio = fim
 
-	for via in gdf_vias.itertuples():
-		geometrias = []
-		if isinstance(via.geometry, LineString):
-			geometrias = [via.geometry]
-		elif isinstance(via.geometry, MultiLineString):
-			geometrias = list(via.geometry.geoms)
+	grafo.add_edges_from(arestas)
 
-		if not geometrias or not all(g.is_valid and not g.is_empty for g in geometrias):
-			continue
+	return grafo
 
-		direcao = via.DIR
-		via_id_principal = via.ID
 
-		if not isinstance(direcao, int) or not isinstance(via_id_principal, int):
-			raise ValueError("Erro na direção ou no id da via")
+def encontrar_no_mais_proximo(ponto: Point, arvore_nos: cKDTree) -> int:
+	"""
+	Encontra o Nó mais próximo de forma otimizada, usando uma KDTree pré-calculada sobre as coordenadas dos nós.
 
-		for linha in geometrias:
-			criacao_arestas(grafo, linha, pontos_articulacao, centroids_bairros, lista_tipos_bairros, via_id_principal, direcao)
+	Returns:
+		int: O índice do nó na árvore, que é o mesmo da matriz de `grafo_para_matriz_esparsa` quando a árvore é construída sobre a sua
+			lista de nós.
+	"""
+	_, idx = arvore_nos.query((ponto.x, ponto.y))
+	return int(idx)
 
-	return grafo
 
+def grafo_para_matriz_esparsa(grafo: nx.MultiDiGraph) -> tuple[csr_matrix, list[tuple[float, float]], dict[tuple[float, float], int]]:
+	"""
+	Converte o grafo em uma matriz de adjacência esparsa (CSR) ponderada pelo atributo "weight", para uso com `scipy.sparse.csgraph`.
+
+	Entre arestas paralelas mantém apenas a de menor peso, que é a única considerada pelo Dijkstra.
 
-def encontrar_no_mais_proximo(ponto: Point, nos_grafo_multipoint: MultiPoint):
+	Returns:
+		tuple: A matriz CSR, a lista de nós na ordem dos índices da matriz e o dicionário nó -> índice.
+	"""
+	nos = list(grafo.nodes())
+	indice_nos = {no: i for i, no in enumerate(nos)}
+	n = len(nos)
+
+	qtd_arestas = grafo.number_of_edges()
+	origens = np.empty(qtd_arestas, dtype=np.int64)
+	destinos = np.empty(qtd_arestas, dtype=np.int64)
+	pesos = np.empty(qtd_arestas, dtype=np.float64)
+	for i, (u, v, peso) in enumerate(grafo.edges(data="weight")):
+		origens[i] = indice_nos[u]
+		destinos[i] = indice_nos[v]
+		pesos[i] = peso
+
+	# Ordena por (origem, destino, peso) e mantém a primeira ocorrência de cada par, ou seja, a de menor peso
+	ordem = np.lexsort((pesos, destinos, origens))
+	origens, destinos, pesos = origens[ordem], destinos[ordem], pesos[ordem]
+	primeiros = np.ones(qtd_arestas, dtype=bool)
+	primeiros[1:] = (origens[1:] != origens[:-1]) | (destinos[1:] != destinos[:-1])
+
+	matriz = csr_matrix((pesos[primeiros], (origens[primeiros], destinos[primeiros])), shape=(n, n))
+	return matriz, nos, indice_nos
+
+
+def reconstruir_caminho(predecessores: np.ndarray, idx_origem: int, idx_destino: int) -> Optional[list[int]]:
 	"""
-	Encontra o Nó mais próximo de forma otimizada, recebendo um MultiPoint pré-calculado.
+	Reconstrói a sequência de índices de nós de um caminho mínimo a partir da linha de predecessores retornada por `scipy.sparse.csgraph.dijkstra`.
+
+	Retorna None se o destino não for alcançável a partir da origem.
 	"""
-	ponto_mais_proximo = nearest_points(ponto, nos_grafo_multipoint)[1]
-	return (ponto_mais_proximo.x, ponto_mais_proximo.y)
+	if idx_origem == idx_destino:
+		return [idx_origem]
+
+	caminho = [idx_destino]
+	atual = predecessores[idx_destino]
+	while atual >= 0:
+		caminho.append(int(atual))
+		if atual == idx_origem:
+			return caminho[::-1]
+		atual = predecessores[atual]
+
+	return None
 
 
 def filtrar_sublinhas(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
 	"""
 	Remove eficientemente as geometrias de LineString que são "sublinhas", ou seja, que estão completamente contidas dentro de outras LineStrings no mesmo GeoDataFrame.
 
-	Usa uma junção espacial (sjoin) para performance.
+	Consulta uma STRtree das próprias linhas com o predicado "within" sobre as geometrias originais. As rotas são formadas pelos mesmos nós do
+	grafo, então um trecho contido em outra rota tem exatamente os mesmos vértices e dispensa a tolerância de um buffer.
 	"""
 	if gdf.empty:
 		return gdf
 
-	gdf_com_buffer = gdf.copy()
-	gdf_com_buffer.geometry = gdf.geometry.buffer(1e-2)
+	geometrias = gdf.geometry.values
+	idx_contidas, idx_contentoras = STRtree(geometrias).query(geometrias, predicate="within")
 
-	gdf_sjoined = gpd.sjoin(gdf, gdf_com_buffer, how="left", predicate="within")
-
-	linhas_contidas = gdf_sjoined[gdf_sjoined.index != gdf_sjoined["index_right"]]
-
-	indices_das_sublinhas = linhas_contidas.index.unique()
+	indices_das_sublinhas = gdf.index[np.unique(idx_contidas[idx_contidas != idx_contentoras])]
 
 	gdf_filtrado = gdf.drop(index=indices_das_sublinhas)
 
@@ -207,39 +309,73 @@ def _obter_ponto_central(gdf_bairros: gpd.GeoDataFrame, nome_bairro_central: Opt
 	return ponto
 
 
-def _calcular_rota_individual(
-	grafo: nx.MultiDiGraph, no_origem: tuple[float, float], no_destino: tuple[float, float], sentido: Literal["IDA", "VOLTA"]
-) -> Optional[LineString]:
+def _calcular_arvore_hub(matriz_grafo: csr_matrix, idx_central: int, sentido: Literal["IDA", "VOLTA"]) -> np.ndarray:
 	"""
-	Calcula o caminho mínimo entre dois nós do grafo e retorna a LineString. Retorna None se não houver caminho ou se o caminho for trivial (ponto único).
+	Calcula, com um único Dijkstra a partir do hub, a árvore de caminhos mínimos que o liga a todos os nós do grafo.
+
+	Em "VOLTA" (hub -> bairro) a busca segue o sentido das arestas; em "IDA" (bairro -> hub) ela é feita sobre o grafo transposto, de modo
+	que o predecessor de cada nó é o próximo nó do caminho em direção ao hub.
 	"""
-	source, target = (no_origem, no_destino) if sentido == "IDA" else (no_destino, no_origem)
+	matriz = matriz_grafo if sentido == "VOLTA" else matriz_grafo.transpose().tocsr()
+
+	_, predecessores = dijkstra(matriz, directed=True, indices=idx_central, return_predecessors=True)
+	return predecessores
 
-	try:
-		caminho_nos = nx.dijkstra_path(grafo, source=source, target=target, weight="weight")
 
-		if len(caminho_nos) < 2:
-			return None
+def _calcular_rota_individual(
+	predecessores: np.ndarray, coords_nos: np.ndarray, idx_central: int, idx_bairro: int, sentido: Literal["IDA", "VOLTA"]
+) -> Optional[LineString]:
+	"""
+	Extrai da árvore de caminhos do hub a rota de um bairro e retorna a LineString.
 
-		return LineString(caminho_nos)
+	Retorna None se não houver caminho ou se o caminho for trivial (ponto único).
+	"""
+	caminho = reconstruir_caminho(predecessores, idx_central, idx_bairro)
 
-	except nx.NetworkXNoPath:
+	if caminho is None or len(caminho) < 2:
 		return None
 
+	if sentido == "IDA":
+		caminho = caminho[::-1]
+
+	return LineString(coords_nos[caminho])
+
 
 def encontrar_caminho_minimo(
-	gdf_bairros: gpd.GeoDataFrame, grafo: nx.MultiDiGraph, bairro_central: Optional[str] = None, sentido: Literal["IDA", "VOLTA"] = "IDA"
+	gdf_bairros: gpd.GeoDataFrame,
+	grafo: nx.MultiDiGraph,
+	bairro_central: Optional[str] = None,
+	sentido: Literal["IDA", "VOLTA"] = "IDA",
+	grafo_esparso: Optional[tuple[csr_matrix, list[tuple], dict[tuple, int]]] = None,
 ) -> gpd.GeoDataFrame:
 	"""
 	Orquestra o cálculo de rotas entre todos os bairros e um ponto central.
+
+	Todas as rotas saem de uma única árvore de caminhos mínimos calculada a partir do hub; a rota de cada bairro é obtida percorrendo
+	os predecessores.
+
+	`grafo_esparso` é o resultado de `grafo_para_matriz_esparsa(grafo)`. Quando informado, a conversão não é refeita, o que permite
+	calcular IDA e VOLTA sobre a mesma matriz.
 	"""
 	if grafo.number_of_nodes() == 0:
-		return gpd.GeoDataFrame(crs=constants.CRS_PROJETADO)
+		return gpd.GeoDataFrame(geometry=[], crs=constants.CRS_PROJETADO)
 
-	nos_multipoint = MultiPoint([Point(no) for no in grafo.nodes()])
+	matriz_grafo, nos, _ = grafo_esparso if grafo_esparso is not None else grafo_para_matriz_esparsa(grafo)
+	coords_nos = np.fromiter(nos, dtype=np.dtype((np.float64, 2)), count=len(nos))
+	arvore_nos = cKDTree(coords_nos)
 
 	ponto_central_geom = _obter_ponto_central(gdf_bairros, bairro_central)
-	no_central = encontrar_no_mais_proximo(ponto_central_geom, nos_multipoint)
+	idx_central = encontrar_no_mais_proximo(ponto_central_geom, arvore_nos)
+	predecessores = _calcular_arvore_hub(matriz_grafo, idx_central, sentido)
+
+	# Nó mais próximo do centroide de cada bairro, em uma única consulta à KDTree
+	centroides = gdf_bairros.geometry.centroid
+	_, idx_nos_bairros = arvore_nos.query(shapely.get_coordinates(centroides.values))
+
+	geometrias_bairros = gdf_bairros.geometry.values
+	eh_poligono = np.isin(shapely.get_type_id(geometrias_bairros), (shapely.GeometryType.POLYGON, shapely.GeometryType.MULTIPOLYGON))
+	arvore_bairros = STRtree(geometrias_bairros)
+	nomes_bairros_gdf = gdf_bairros[columns.NOME_BAIRRO].to_numpy()
 
 	lista_caminhos = []
 	bairro_central_limpo = bairro_central.strip() if bairro_central else None
@@ -248,19 +384,14 @@ def encontrar_caminho_minimo(
 		if bairro_central_limpo and bairro.NM_BAIRRO.strip() == bairro_central_limpo:
 			continue
 
-		if bairro.geometry.geom_type not in ("Polygon", "MultiPolygon"):
+		if not eh_poligono[index]:
 			continue
 
-		ponto_bairro = bairro.geometry.centroid
-		no_bairro = encontrar_no_mais_proximo(ponto_bairro, nos_multipoint)
-
-		geometria_rota = _calcular_rota_individual(grafo, no_bairro, no_central, sentido)
+		geometria_rota = _calcular_rota_individual(predecessores, coords_nos, idx_central, int(idx_nos_bairros[index]), sentido)
 
 		if geometria_rota:
-			gdf_temp = gpd.GeoDataFrame([{"geometry": geometria_rota}], crs=constants.CRS_PROJETADO)
-			intersectados = gpd.sjoin(gdf_temp, gdf_bairros, how="inner", predicate="intersects")
-			# nome_coluna = "CD_SETOR" if "CD_SETOR" in intersectados.columns else "name"
-			nomes_bairros = intersectados[columns.NOME_BAIRRO].unique()
+			intersectados = arvore_bairros.query(geometria_rota, predicate="intersects")
+			nomes_bairros = pd.unique(nomes_bairros_gdf[intersectados])
 
 			lista_caminhos.append({
 				"geometry": geometria_rota,
@@ -273,7 +404,7 @@ def encontrar_caminho_minimo(
 			pass
 
 	if not lista_caminhos:
-		return gpd.GeoDataFrame(crs=constants.CRS_PROJETADO)
+		return gpd.GeoDataFrame(geometry=[], crs=constants.CRS_PROJETADO)
 
 	gdf_rotas = gpd.GeoDataFrame(lista_caminhos, crs=constants.CRS_PROJETADO)
 
@@ -1,12 +1,94 @@
+import contextlib
+import functools
+import hashlib
 import os
-from typing import Any, Optional
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 import geopandas as gpd
-import networkx as nx
+import numpy as np
+import pandas as pd
+import shapely
+from pyproj import CRS
+from shapely import STRtree
 
 from ..utils import columns, constants
-from . import analysis, data_exporter, data_loader, network_design, visualization
-from .ibge_downloader import baixar_dados_censo_renda, baixar_malha_municipal
+from . import analysis, data_exporter, data_loader
+
+if TYPE_CHECKING:
+	import networkx as nx
+	from scipy.sparse import csr_matrix
+
+# Diretório dos dados baixados do IBGE e dos caches, resolvido uma única vez na importação
+_DIRETORIO_DADOS = os.path.join(os.path.expanduser("~"), "modelo_reset_data")
+
+# Camadas exigidas para montar o grafo e para exibir as rotas otimizadas
+_CAMADAS_GRAFO = frozenset({columns.CAMADA_BAIRRO, columns.CAMADA_VIAS, columns.CAMADA_PONTOS_ARTICULACO})
+_CAMADAS_ROTAS_OTIMIZADAS = frozenset({columns.CAMADA_VIAS_FILTRADA, columns.CAMADA_BAIRRO, columns.CAMADA_CAMINHO_IDA, columns.CAMADA_CAMINHO_VOLTA})
+
+# Tipo da coluna columns.POLO: categórica, com um código int8 por bairro em vez de uma string Python
+_DTYPE_POLO = pd.CategoricalDtype(constants.TIPOS_POLO)
+
+
+# Uma execução relê no máximo os setores, a renda e a pesquisa OD; mais entradas só manteriam em memória arquivos de execuções anteriores
+@functools.lru_cache(maxsize=3)
+def _ler_arquivo_em_cache(leitor: Callable, path: str, mtime_ns: int, tamanho: int, *args, **kwargs):
+	"""
+	Lê um arquivo com `leitor` e memoriza o resultado. A data de modificação e o tamanho entram na chave, então um arquivo alterado é relido.
+	"""
+	return leitor(path, *args, **kwargs)
+
+
+def _ler_com_cache(leitor: Callable, path: str, *args, **kwargs):
+	"""
+	Lê um arquivo usando o cache de leituras e devolve uma cópia, para que alterações feitas pelo chamador não contaminem o cache.
+	"""
+	info = os.stat(path)
+	return _ler_arquivo_em_cache(leitor, path, info.st_mtime_ns, info.st_size, *args, **kwargs).copy()
+
+
+def _impressao_digital_camada(gdf: Optional[gpd.GeoDataFrame]) -> Optional[str]:
+	"""
+	Resume o conteúdo de uma camada (colunas, tipos, CRS, valores e geometrias) num hash.
+
+	Uma camada alterada gera outro hash e não reaproveita o cache da anterior. Retorna None se algum valor não puder ser resumido, caso em
+	que o cache não é usado.
+	"""
+	if gdf is None:
+		return "sem_camada"
+	try:
+		valores = pd.util.hash_pandas_object(gdf.to_wkb(), index=True).to_numpy()
+	except TypeError:
+		return None
+	resumo = hashlib.sha1(valores.tobytes())
+	resumo.update(repr((list(gdf.columns), [str(tipo) for tipo in gdf.dtypes], str(gdf.crs))).encode("utf-8"))
+	return resumo.hexdigest()
+
+
+def _gravar_parquet_atomico(gdf: gpd.GeoDataFrame, caminho: str):
+	"""
+	Grava o GeoParquet num arquivo temporário do mesmo diretório e o move para `caminho` com `os.replace`.
+
+	Uma gravação interrompida nunca deixa um arquivo truncado no lugar do anterior.
+	"""
+	diretorio = os.path.dirname(caminho)
+	os.makedirs(diretorio, exist_ok=True)
+	descritor, temporario = tempfile.mkstemp(dir=diretorio, suffix=".parquet.tmp")
+	os.close(descritor)
+	try:
+		gdf.to_parquet(temporario, compression="zstd", geometry_encoding="geoarrow")
+		os.replace(temporario, caminho)
+	finally:
+		with contextlib.suppress(FileNotFoundError):
+			os.remove(temporario)
+
+
+def _polos_nenhum(quantidade: int) -> pd.Categorical:
+	"""
+	Cria a coluna de tipo de polo com todos os bairros classificados como "Nenhum".
+	"""
+	return pd.Categorical.from_codes(np.zeros(quantidade, dtype=np.int8), dtype=_DTYPE_POLO)
 
 
 class ModeloReset:
@@ -24,7 +106,12 @@ class ModeloReset:
 		self.camadas[columns.CAMADA_BAIRRO] = None
 		self.crs_padrao: str = "EPSG:4326"
 		self.crs_projetado: str = crs_projetado
-		self.grafo: Optional[nx.MultiDiGraph] = None
+		self.grafo: Optional["nx.MultiDiGraph"] = None
+		self.grafo_esparso: Optional[tuple["csr_matrix", list[tuple], dict[tuple, int]]] = None
+		# Índice espacial da camada de bairros e a camada/CRS para os quais ele foi construído
+		self._indice_bairros: Optional[tuple[gpd.GeoDataFrame, Any, STRtree]] = None
+		# Arquivo de onde cada camada do IBGE foi lida e o objeto carregado dele, usados para invalidar o cache da camada de bairros processada
+		self._arquivos_origem: dict[str, tuple[str, Any]] = {}
 
 	def carregar_dados_base(self, path_bairros: Optional[str] = None, epsg_bairros: Optional[str] = None):
 		"""Carrega as camadas de dados geográficos base (bairros e residências).
@@ -42,25 +129,35 @@ class ModeloReset:
 				columns={columns.NOME_BAIRRO_SHAPEFILE: columns.NOME_BAIRRO}
 			)
 
-	def carregar_dados_ibge(self, ano_censo: int, uf: str = "MG"):
+	def carregar_dados_ibge(self, ano_censo: int, uf: str = "MG", usar_cache: bool = False):
 		"""Carrega os dados do IBGE (setores censitários e dados de renda).
 
 		Args:
 			ano_malha (int): O ano da malha territorial do IBGE (ex: 2024).
 			ano_censo (int): O ano do censo do IBGE (ex: 2022).
 			uf (str): A sigla do estado em maiúsculas (ex: "SP", "MG").
+			usar_cache (bool, optional): Reaproveita a leitura dos arquivos já feita nesta sessão, enquanto eles não forem alterados no disco.
+				As leituras ficam em memória até o fim da sessão e cada chamada recebe uma cópia delas. Padrão é False.
 		"""
-		path_setores = baixar_malha_municipal(
-			diretorio_saida=os.path.join((os.path.expanduser("~")), "modelo_reset_data", "malha"), uf=uf, ano=ano_censo
-		)
-		path_renda = baixar_dados_censo_renda(diretorio_saida=os.path.join((os.path.expanduser("~")), "modelo_reset_data"), ano=ano_censo)
+		from .ibge_downloader import baixar_dados_censo_renda, baixar_malha_municipal
+
+		path_setores = baixar_malha_municipal(diretorio_saida=os.path.join(_DIRETORIO_DADOS, "malha"), uf=uf, ano=ano_censo)
+		path_renda = baixar_dados_censo_renda(diretorio_saida=_DIRETORIO_DADOS, ano=ano_censo)
 
 		if path_setores is None or path_renda is None:
 			raise Exception("Erro ao baixar dados do IBGE.")
 
-		gdf_setores = data_loader.ler_shapefile(path_setores, self.crs_padrao)
-		self.camadas[columns.CAMADA_SETORES] = gdf_setores.copy()
-		self.camadas[columns.CAMADA_RENDA] = data_loader.ler_renda_csv(path_renda, separador=";")
+		if usar_cache:
+			gdf_setores = _ler_com_cache(data_loader.ler_shapefile, path_setores, self.crs_padrao)
+			df_renda = _ler_com_cache(data_loader.ler_renda_csv, path_renda, separador=";")
+		else:
+			gdf_setores = data_loader.ler_shapefile(path_setores, self.crs_padrao)
+			df_renda = data_loader.ler_renda_csv(path_renda, separador=";")
+
+		self.camadas[columns.CAMADA_SETORES] = gdf_setores
+		self.camadas[columns.CAMADA_RENDA] = df_renda
+		self._arquivos_origem[columns.CAMADA_SETORES] = (os.path.abspath(path_setores), gdf_setores)
+		self._arquivos_origem[columns.CAMADA_RENDA] = (os.path.abspath(path_renda), df_renda)
 		gdf_bairros_atual = self.camadas.get(columns.CAMADA_BAIRRO)
 
 		if gdf_bairros_atual is None or gdf_bairros_atual.empty:
@@ -85,7 +182,7 @@ class ModeloReset:
 		setores_filtrados = analysis.filtrar_setores_por_municipio(self.camadas[columns.CAMADA_SETORES], municipio)
 		if self.camadas.get(columns.CAMADA_BAIRRO, None) is None:
 			self.camadas[columns.CAMADA_BAIRRO] = setores_filtrados.copy()
-		self.camadas[columns.CAMADA_BAIRRO][columns.POLO] = "Nenhum"
+		self.camadas[columns.CAMADA_BAIRRO][columns.POLO] = _polos_nenhum(len(self.camadas[columns.CAMADA_BAIRRO]))
 		setores_com_renda = analysis.vincular_setores_com_renda(setores_filtrados, self.camadas[columns.CAMADA_RENDA])
 		bairros_com_renda = analysis.agregar_renda_por_bairro(self.camadas[columns.CAMADA_BAIRRO], setores_com_renda, self.crs_projetado)
 		self.camadas[columns.CAMADA_BAIRRO] = bairros_com_renda
@@ -95,26 +192,111 @@ class ModeloReset:
 		"""Calcula a densidade populacional para a camada de bairros."""
 		self.camadas[columns.CAMADA_BAIRRO] = analysis.calcular_densidade_populacional(self.camadas[columns.CAMADA_BAIRRO], self.crs_projetado)
 
-	def processar_dados(self, municipio: str):
-		"""Função responsável por processar todos os dados necessários."""
+	def _caminho_cache_bairros(self, municipio: str) -> Optional[str]:
+		"""Retorna o caminho do GeoParquet com a camada de bairros processada para o município.
+
+		O nome do arquivo depende do município, do CRS projetado, do conteúdo da camada de bairros de entrada e dos arquivos de onde os
+		setores e a renda foram lidos, de modo que entradas diferentes não compartilham o mesmo cache.
+
+		Args:
+			municipio (str): Nome do município processado.
+
+		Returns:
+			Optional[str]: O caminho do arquivo, ou None se o cache não puder ser usado (pyarrow ausente, ou setores e renda que não são mais
+				os lidos dos arquivos registrados).
+		"""
+		if not constants.PYARROW_DISPONIVEL:
+			return None
+		origens = []
+		for camada in (columns.CAMADA_SETORES, columns.CAMADA_RENDA):
+			path, camada_lida = self._arquivos_origem.get(camada, (None, None))
+			# Uma camada atribuída ou substituída depois da leitura não corresponde mais ao arquivo registrado
+			if path is None or self.camadas.get(camada) is not camada_lida:
+				return None
+			origens.append(f"{camada}={path}")
+		impressao_bairros = _impressao_digital_camada(self.camadas.get(columns.CAMADA_BAIRRO))
+		if impressao_bairros is None:
+			return None
+		chave = "|".join([municipio, str(self.crs_projetado), impressao_bairros, *origens])
+		resumo = hashlib.sha1(chave.encode("utf-8")).hexdigest()[:16]
+		return os.path.join(_DIRETORIO_DADOS, "cache", f"bairros_{resumo}.parquet")
+
+	def _cache_bairros_valido(self, caminho_cache: str) -> bool:
+		"""Verifica se o cache existe e é mais recente que todos os arquivos de origem."""
+		if not os.path.exists(caminho_cache):
+			return False
+		mtime_cache = os.stat(caminho_cache).st_mtime_ns
+		return all(os.path.exists(path) and os.stat(path).st_mtime_ns < mtime_cache for path, _ in self._arquivos_origem.values())
+
+	def processar_dados(self, municipio: str, usar_cache: bool = False):
+		"""Função responsável por processar todos os dados necessários.
+
+		Com `usar_cache` e o pyarrow disponível, a camada de bairros processada é gravada em GeoParquet e reaproveitada nas execuções
+		seguintes com a mesma camada de bairros e os mesmos arquivos do IBGE, enquanto eles não forem alterados. Ao usar o cache, a camada
+		de setores não é reprocessada.
+
+		Args:
+			municipio (str): Nome do município para filtrar os setores censitários.
+			usar_cache (bool, optional): Lê e grava o cache da camada de bairros processada. Padrão é False.
+		"""
+		# O caminho é calculado antes do processamento, que altera a camada de bairros de entrada
+		caminho_cache = self._caminho_cache_bairros(municipio) if usar_cache else None
+		if caminho_cache is not None and self._cache_bairros_valido(caminho_cache):
+			try:
+				self.camadas[columns.CAMADA_BAIRRO] = gpd.read_parquet(caminho_cache)
+				return
+			except Exception:
+				# Cache ilegível: a camada é reprocessada e o arquivo, regravado
+				pass
+
 		self._processar_renda_ibge(municipio)
 		self._processar_densidade()
 
-	def carregar_e_processar_od(self, path_od: str):
+		if caminho_cache is not None:
+			_gravar_parquet_atomico(self.camadas[columns.CAMADA_BAIRRO], caminho_cache)
+
+	def carregar_e_processar_od(self, path_od: str, usar_cache: bool = False):
 		"""Carrega dados de Origem-Destino e calcula os fluxos por bairro.
 
 		Args:
-			path_od (str): Caminho para o arquivo CSV de Origem-Destino.
+			path_od (str): Caminho para o arquivo CSV ou Parquet de Origem-Destino.
+			usar_cache (bool, optional): Reaproveita a leitura do arquivo já feita nesta sessão, enquanto ele não for alterado no disco.
+				A leitura fica em memória até o fim da sessão e cada chamada recebe uma cópia dela. Padrão é False.
 		"""
-		df_od = data_loader.ler_od_csv(path_od)
+		df_od = _ler_com_cache(data_loader.ler_od_csv, path_od) if usar_cache else data_loader.ler_od_csv(path_od)
+
+		origem_gdf, contagem_origem = self._pontos_od_unicos(df_od, "longitude_origem", "latitude_origem")
+		destino_gdf, contagem_destino = self._pontos_od_unicos(df_od, "longitude_destino", "latitude_destino")
+
+		self.camadas[columns.CAMADA_BAIRRO] = analysis.calcular_fluxos_od(
+			self.camadas[columns.CAMADA_BAIRRO],
+			origem_gdf,
+			destino_gdf,
+			arvore_bairros=self._indice_espacial_bairros(),
+			contagem_origem=contagem_origem,
+			contagem_destino=contagem_destino,
+		)
+
+	def _pontos_od_unicos(self, df_od: pd.DataFrame, coluna_lon: str, coluna_lat: str) -> tuple[gpd.GeoDataFrame, np.ndarray]:
+		"""Agrupa as viagens que compartilham as mesmas coordenadas em um único ponto.
 
-		geom_origem = gpd.points_from_xy(df_od["longitude_origem"], df_od["latitude_origem"])
-		origem_gdf = gpd.GeoDataFrame(df_od, geometry=geom_origem, crs=self.crs_padrao)
+		Várias viagens costumam partir da mesma residência ou chegar ao mesmo local, então só os pares de coordenadas distintos precisam
+		ser reprojetados e testados contra os bairros. Linhas sem coordenadas são descartadas, como já não caíam em nenhum bairro.
 
-		geom_destino = gpd.points_from_xy(df_od["longitude_destino"], df_od["latitude_destino"])
-		destino_gdf = gpd.GeoDataFrame(df_od, geometry=geom_destino, crs=self.crs_padrao)
+		Args:
+			df_od (pd.DataFrame): Dados de Origem-Destino.
+			coluna_lon (str): Coluna com a longitude dos pontos.
+			coluna_lat (str): Coluna com a latitude dos pontos.
 
-		self.camadas[columns.CAMADA_BAIRRO] = analysis.calcular_fluxos_od(self.camadas[columns.CAMADA_BAIRRO], origem_gdf, destino_gdf)
+		Returns:
+			tuple[gpd.GeoDataFrame, np.ndarray]: Os pontos distintos (só a geometria) e quantas viagens cada um representa.
+		"""
+		contagem = df_od.groupby([coluna_lon, coluna_lat], sort=False).size()
+		# Os pontos são criados direto dos arrays float64 de coordenadas; a contagem por bairro só usa a geometria
+		geometria = shapely.points(
+			contagem.index.get_level_values(0).to_numpy(dtype=np.float64), contagem.index.get_level_values(1).to_numpy(dtype=np.float64)
+		)
+		return gpd.GeoDataFrame(geometry=geometria, crs=self.crs_padrao), contagem.to_numpy()
 
 	def identificar_polos_planejados(self, *polos_planejados: str):
 		"""Define polos planejados e identifica polos emergentes e consolidados.
@@ -145,19 +327,34 @@ class ModeloReset:
 		"""
 		Garante que todas as camadas de análise estejam projetadas no CRS métrico.
 		"""
-		# target_crs = f"EPSG:{self.crs_projetado}"
+		# A camada projetada substitui a original, então chamadas seguintes encontram o CRS já equivalente e não reprojetam nada. A
+		# comparação é feita entre objetos CRS, e não entre strings, para reconhecer definições equivalentes escritas de formas diferentes.
+		crs_destino = CRS.from_user_input(self.crs_projetado)
 
-		camadas_para_projetar = ["bairros", "vias", "pontos_articulacao"]
+		camadas_para_projetar = [columns.CAMADA_BAIRRO, columns.CAMADA_VIAS, columns.CAMADA_PONTOS_ARTICULACO]
 
 		for nome_camada in camadas_para_projetar:
-			if nome_camada in self.camadas:
-				if self.camadas[nome_camada].crs != self.crs_projetado:
-					self.camadas[nome_camada] = self.camadas[nome_camada].to_crs(self.crs_projetado)
-				else:
-					self.camadas[nome_camada] = self.camadas[nome_camada]
-			else:
+			camada = self.camadas.get(nome_camada)
+			if camada is None:
 				continue
 
+			if camada.crs is None or not CRS.from_user_input(camada.crs).equals(crs_destino, ignore_axis_order=True):
+				self.camadas[nome_camada] = camada.to_crs(crs_destino)
+
+	def _indice_espacial_bairros(self) -> STRtree:
+		"""
+		Retorna a STRtree dos polígonos da camada de bairros, reconstruindo-a apenas quando a camada foi substituída ou mudou de CRS.
+		"""
+		bairros = self.camadas[columns.CAMADA_BAIRRO]
+
+		if self._indice_bairros is None or self._indice_bairros[0] is not bairros or self._indice_bairros[1] != bairros.crs:
+			arvore = STRtree(bairros.geometry.values)
+			# Polígonos preparados uma vez por árvore; uma camada substituída ou reprojetada gera geometrias novas e, portanto, uma árvore nova
+			shapely.prepare(arvore.geometries)
+			self._indice_bairros = (bairros, bairros.crs, arvore)
+
+		return self._indice_bairros[2]
+
 	def set_polos_planejados(self, *args: str):
 		"""Define manualmente quais bairros são classificados como "Planejado".
 
@@ -168,13 +365,15 @@ class ModeloReset:
 		if bairros.empty:
 			return
 
-		bairros[columns.POLO] = "Nenhum"
-		for polo in args:
-			bairros.loc[bairros[columns.NOME_BAIRRO].isin([polo]), columns.POLO] = "Planejado"
+		# Os códigos das categorias saem direto da máscara, numa única atribuição da coluna
+		planejados = bairros[columns.NOME_BAIRRO].isin(args).to_numpy()
+		codigos = np.where(planejados, _DTYPE_POLO.categories.get_loc("Planejado"), 0).astype(np.int8)
+		bairros[columns.POLO] = pd.Categorical.from_codes(codigos, dtype=_DTYPE_POLO)
 
 	def _montar_grafo(self):
-		camadas_necessarias = ["bairros", "vias", "pontos_articulacao"]
-		if not all(k in self.camadas for k in camadas_necessarias):
+		from . import network_design
+
+		if not _CAMADAS_GRAFO <= self.camadas.keys():
 			raise ValueError("Camadas 'bairros', 'vias' e 'pontos_articulacao' são necessárias. Carregue-as primeiro.")
 
 		self._projetar_camadas_para_analise()
@@ -183,10 +382,12 @@ class ModeloReset:
 		vias_proj = self.camadas[columns.CAMADA_VIAS]
 		pontos_art_proj = self.camadas[columns.CAMADA_PONTOS_ARTICULACO]
 
-		vias_filtradas = network_design.filtrar_vias_por_bairros(vias_proj, bairros_proj)
+		vias_filtradas = network_design.filtrar_vias_por_bairros(vias_proj, bairros_proj, arvore_bairros=self._indice_espacial_bairros())
 		self.camadas[columns.CAMADA_VIAS_FILTRADA] = vias_filtradas
 
 		self.grafo = network_design.criar_grafo_ponderado(vias_filtradas, pontos_art_proj, bairros_proj)
+		# Matriz CSR do grafo (Dijkstra em C, via scipy), montada uma única vez e compartilhada pelos cálculos de IDA e VOLTA
+		self.grafo_esparso = network_design.grafo_para_matriz_esparsa(self.grafo)
 
 	def gerar_rotas_otimizadas(self, bairro_central: Optional[str] = None):
 		"""
@@ -197,6 +398,8 @@ class ModeloReset:
 		3. Gera o grafo ponderado.
 		4. Calcula os caminhos de ida e volta.
 		"""
+		from . import network_design
+
 		# 1. Garantir que as camadas estão prontas e projetadas
 
 		self._montar_grafo()
@@ -205,43 +408,68 @@ class ModeloReset:
 		if not self.grafo:
 			raise Exception("Falha ao criar o grafo.")
 
-		# 4. Calcular caminhos
-		self.camadas[columns.CAMADA_CAMINHO_VOLTA] = network_design.encontrar_caminho_minimo(
-			bairros_proj, self.grafo, bairro_central=bairro_central, sentido="VOLTA"
-		)
+		# 4. Calcular caminhos. IDA e VOLTA são independentes e só leem o grafo, então rodam em paralelo (o Dijkstra do scipy e as
+		# consultas espaciais do shapely são executados em código nativo)
+		with ThreadPoolExecutor(max_workers=2) as executor:
+			futuro_volta = executor.submit(
+				network_design.encontrar_caminho_minimo,
+				bairros_proj,
+				self.grafo,
+				bairro_central=bairro_central,
+				sentido="VOLTA",
+				grafo_esparso=self.grafo_esparso,
+			)
+			futuro_ida = executor.submit(
+				network_design.encontrar_caminho_minimo,
+				bairros_proj,
+				self.grafo,
+				bairro_central=bairro_central,
+				sentido="IDA",
+				grafo_esparso=self.grafo_esparso,
+			)
 
-		self.camadas[columns.CAMADA_CAMINHO_IDA] = network_design.encontrar_caminho_minimo(
-			bairros_proj, self.grafo, bairro_central=bairro_central, sentido="IDA"
-		)
+			self.camadas[columns.CAMADA_CAMINHO_VOLTA] = futuro_volta.result()
+			self.camadas[columns.CAMADA_CAMINHO_IDA] = futuro_ida.result()
 
-		self.camadas[columns.CAMADA_ROTAS_CONCATENADAS] = gpd.pd.concat([
-			self.camadas[columns.CAMADA_CAMINHO_VOLTA],
-			self.camadas[columns.CAMADA_CAMINHO_IDA],
-		])
+		caminhos_volta = self.camadas[columns.CAMADA_CAMINHO_VOLTA]
+		caminhos_ida = self.camadas[columns.CAMADA_CAMINHO_IDA]
+
+		# Só concatena quando os dois sentidos têm rotas: um lado vazio não acrescenta linhas, mas faria o pandas copiar o outro e
+		# converter as colunas inteiras para float
+		if caminhos_volta.empty or caminhos_ida.empty:
+			self.camadas[columns.CAMADA_ROTAS_CONCATENADAS] = caminhos_ida if caminhos_volta.empty else caminhos_volta
+		else:
+			self.camadas[columns.CAMADA_ROTAS_CONCATENADAS] = gpd.pd.concat([caminhos_volta, caminhos_ida])
 
 	def mostrar_centroids(self):
 		"""Plota os bairros e os centroides dos setores censitários associados."""
-		setores = self.camadas[columns.CAMADA_SETORES].copy()
-		crs_original = setores.crs
+		from . import visualization
 
-		setores_projetado = setores.to_crs(epsg=self.crs_projetado)
+		setores = self.camadas[columns.CAMADA_SETORES]
+		bairros = self.camadas[columns.CAMADA_BAIRRO]
 
-		centroides_projetados = setores_projetado.geometry.centroid
+		# Centroides calculados no CRS métrico; só os pontos são levados ao CRS dos bairros para a consulta, nunca os polígonos de volta
+		centroides = setores.geometry.to_crs(self.crs_projetado).centroid
+		pontos_consulta = centroides if CRS.from_user_input(self.crs_projetado).equals(bairros.crs) else centroides.to_crs(bairros.crs)
 
-		setores["geometry"] = centroides_projetados.to_crs(crs_original)
-		setores_associados = gpd.sjoin(setores, self.camadas[columns.CAMADA_BAIRRO], how="left", predicate="within")
-		setores_associados = setores_associados[setores_associados["index_right"].notnull()]
+		# Mantém apenas os centroides contidos em algum bairro, consultando o índice espacial sem montar o join com os atributos dos bairros
+		idx_centroides, _ = analysis.pontos_dentro_de_poligonos(self._indice_espacial_bairros(), pontos_consulta.values)
+		setores_associados = gpd.GeoDataFrame(geometry=centroides.iloc[np.unique(idx_centroides)])
 
-		visualization.plotar_centroid_e_bairros(self.camadas[columns.CAMADA_BAIRRO], setores_associados, self.crs_projetado)
+		visualization.plotar_centroid_e_bairros(bairros, setores_associados, self.crs_projetado)
 
 	def plotar_densidade(self):
 		"""Gera e exibe um mapa coroplético da densidade populacional dos bairros."""
+		from . import visualization
+
 		visualization.plotar_mapa_coropletico(
 			self.camadas[columns.CAMADA_BAIRRO], self.crs_projetado, columns.DENSIDADE, "Densidade Populacional (hab/km²)", "OrRd"
 		)
 
 	def plotar_renda_media(self):
 		"""Gera e exibe um mapa coroplético da renda média dos bairros."""
+		from . import visualization
+
 		visualization.plotar_mapa_coropletico(
 			self.camadas[columns.CAMADA_BAIRRO], self.crs_projetado, columns.RENDA, "Renda Média por Bairro", "YlGn"
 		)
@@ -250,8 +478,9 @@ class ModeloReset:
 		"""
 		Exibe o mapa final com as rotas de ida e volta otimizadas.
 		"""
-		camadas_necessarias = ["vias_filtradas", "bairros", "caminhos_ida", "caminhos_volta"]
-		if not all(k in self.camadas for k in camadas_necessarias):
+		from . import visualization
+
+		if not _CAMADAS_ROTAS_OTIMIZADAS <= self.camadas.keys():
 			return
 
 		visualization.plotar_caminhos(
@@ -263,10 +492,14 @@ class ModeloReset:
 
 	def mostrar_polos(self):
 		"""Gera e exibe um mapa dos polos de desenvolvimento."""
+		from . import visualization
+
 		visualization.plotar_polos(self.camadas[columns.CAMADA_BAIRRO], self.crs_projetado)
 
 	def mostrar_modelo_completo(self):
 		"""Gera e exibe o mapa final com polos e pontos de articulação."""
+		from . import visualization
+
 		visualization.plotar_modelo_completo(
 			self.camadas[columns.CAMADA_BAIRRO], self.camadas.get(columns.CAMADA_PONTOS_ARTICULACO, gpd.GeoDataFrame()), self.crs_projetado
 		)
@@ -1,10 +1,17 @@
-COLUNAS = {
+import importlib.util
+from types import MappingProxyType
+
+# Tabela só de leitura: a visão imutável impede que um módulo altere o mapeamento usado pelos demais
+COLUNAS = MappingProxyType({
 	"V06001": "num_de_responsaveis",
 	"V06002": "num_de_moradores",
 	"V06003": "variancia_do_num_de_morador",
 	"V06004": "renda_mensal_media",
 	"V06005": "variancia_de_renda",
-}
+})
+
+# Tipos de polo de um bairro, na ordem das categorias da coluna columns.POLO
+TIPOS_POLO = ("Nenhum", "Planejado", "Emergente", "Consolidado")
 
 CRS_PROJETADO = "EPSG:31983"
 CRS_GEOGRAFICO = "EPSG:4326"
@@ -12,3 +19,5 @@ CRS_GEOGRAFICO = "EPSG:4326"
 SHAPEFILE_NAME = "_setores_CD2022.shp"
 CSV_NAME = "Agregados_por_setores_renda_responsavel_BR.csv"
 
+# O pyarrow é opcional: quando instalado, leitura, escrita e processamento de texto usam os formatos colunares do Arrow
+PYARROW_DISPONIVEL = importlib.util.find_spec("pyarrow") is not None
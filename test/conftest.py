@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(scope="session")
+def shared_tmp(tmp_path_factory):
+	"""Diretório temporário criado uma única vez por sessão, para testes que só precisam de alguns arquivos vazios."""
+	return tmp_path_factory.mktemp("compartilhado")
@@ -0,0 +1,173 @@
+import random
+
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import pytest
+from deap import creator, tools
+from shapely.geometry import box
+
+from core.ag import OtimizadorRotas, _criar_tipos_deap, _cruzamento_dois_pontos, _fronteira_pareto, _selecionar_nsga2
+
+
+def criar_populacao(valores):
+	"""Cria indivíduos do DEAP com as aptidões informadas (uma tupla de dois objetivos por indivíduo)."""
+	_criar_tipos_deap()
+	populacao = []
+	for valor in valores:
+		individuo = creator.Individual(np.zeros((1, 2), dtype=np.int64))
+		individuo.fitness.values = tuple(float(v) for v in valor)
+		populacao.append(individuo)
+	return populacao
+
+
+def mesmos_individuos(obtidos, esperados):
+	"""Compara duas listas de indivíduos por identidade, na mesma ordem."""
+	return len(obtidos) == len(esperados) and all(a is b for a, b in zip(obtidos, esperados, strict=True))
+
+
+@pytest.mark.parametrize("semente", range(20))
+@pytest.mark.parametrize("discreto", [True, False], ids=["aptidoes_repetidas", "aptidoes_continuas"])
+def test__selecionar_nsga2_igual_ao_deap(semente, discreto):
+	"""Para todo k, inclusive os que cortam uma frente ao meio, a seleção deve devolver os mesmos indivíduos e na mesma ordem do DEAP."""
+	rng = np.random.default_rng(semente)
+	n = int(rng.integers(2, 40))
+	# Valores inteiros em uma faixa pequena geram aptidões duplicadas e empates na distância de aglomeração
+	valores = rng.integers(0, 5, size=(n, 2)) if discreto else rng.random((n, 2))
+	populacao = criar_populacao(valores)
+
+	for k in range(n + 1):
+		assert mesmos_individuos(_selecionar_nsga2(populacao, k), tools.selNSGA2(populacao, k)), f"k={k}"
+
+
+def test__selecionar_nsga2_frente_com_aptidoes_iguais():
+	"""Indivíduos com a mesma aptidão não dominam uns aos outros e o corte da frente segue o desempate do DEAP."""
+	populacao = criar_populacao([(1, 1), (0, 2), (1, 1), (2, 0), (1, 1), (3, 3)])
+
+	selecionados = _selecionar_nsga2(populacao, 4)
+
+	assert mesmos_individuos(selecionados, tools.selNSGA2(populacao, 4))
+	assert all(ind is not populacao[5] for ind in selecionados)
+
+
+def test__fronteira_pareto():
+	"""A fronteira contém apenas os não dominados, com as aptidões repetidas agrupadas como em `sortNondominated`."""
+	populacao = criar_populacao([(2, 2), (1, 3), (3, 1), (1, 3), (4, 4)])
+
+	fronteira = _fronteira_pareto(populacao)
+
+	assert mesmos_individuos(fronteira, tools.sortNondominated(populacao, len(populacao), first_front_only=True)[0])
+	assert mesmos_individuos(fronteira, [populacao[0], populacao[1], populacao[3], populacao[2]])
+	assert _fronteira_pareto([]) == []
+
+
+@pytest.fixture
+def otimizador():
+	"""
+	Otimizador sobre uma via de mão dupla (0, 0) - (100, 0) - (200, 0) e um trecho isolado (1000, 0) - (1100, 0).
+
+	Os bairros 0 e 1 ficam nas pontas da via e o bairro 2 fica no trecho isolado, sem caminho a partir dos demais.
+	"""
+	grafo = nx.MultiDiGraph()
+	for u, v in [((0.0, 0.0), (100.0, 0.0)), ((100.0, 0.0), (200.0, 0.0)), ((1000.0, 0.0), (1100.0, 0.0))]:
+		grafo.add_edge(u, v, weight=100.0)
+		grafo.add_edge(v, u, weight=100.0)
+
+	gdf_bairros = gpd.GeoDataFrame(
+		{"NM_BAIRRO": ["A", "B", "C"]}, geometry=[box(-10, -10, 10, 10), box(190, -10, 210, 10), box(990, -10, 1010, 10)], crs="EPSG:31983"
+	)
+	return OtimizadorRotas(grafo, gdf_bairros)
+
+
+def criar_individuo(genes):
+	"""Cria um indivíduo (L, 2) a partir de uma lista de pares (origem, destino)."""
+	_criar_tipos_deap()
+	return creator.Individual(np.array(genes, dtype=np.int32))
+
+
+class TestAvaliar:
+	def test_rota_simples(self, otimizador):
+		"""A distância é o comprimento da rota e a cobertura conta os bairros que ela atravessa."""
+		distancia, nao_atendidos = otimizador.avaliar(criar_individuo([[0, 1]]))
+
+		assert distancia == pytest.approx(200)
+		assert nao_atendidos == pytest.approx(1 / 3)
+
+	def test_genes_repetidos(self, otimizador):
+		"""Cada ocorrência de um gene repetido soma a sua distância, mas a cobertura não muda."""
+		distancia, nao_atendidos = otimizador.avaliar(criar_individuo([[0, 1], [1, 0], [0, 1], [0, 1]]))
+
+		assert distancia == pytest.approx(4 * 200)
+		assert nao_atendidos == pytest.approx(1 / 3)
+
+	def test_par_sem_caminho_recebe_penalidade(self, otimizador):
+		"""Uma rota sem caminho no grafo vale a penalidade fixa, uma vez por ocorrência, e não atende nenhum bairro."""
+		assert otimizador.avaliar(criar_individuo([[0, 2]])) == (pytest.approx(100000), pytest.approx(1.0))
+
+		distancia, nao_atendidos = otimizador.avaliar(criar_individuo([[2, 0], [0, 1], [2, 0]]))
+
+		assert distancia == pytest.approx(2 * 100000 + 200)
+		assert nao_atendidos == pytest.approx(1 / 3)
+
+	def test_resultado_independe_do_cache(self, otimizador):
+		"""A segunda avaliação, feita só com as rotas em cache, dá o mesmo resultado da primeira."""
+		individuo = criar_individuo([[1, 0], [0, 2], [1, 0]])
+
+		assert otimizador.avaliar(individuo) == otimizador.avaliar(individuo)
+
+
+def test__cruzamento_dois_pontos_nao_compartilha_memoria():
+	"""Os filhos trocam um trecho de genes sem que um passe a enxergar o array do outro."""
+	random.seed(3)
+	pai1 = criar_individuo([[i, i + 100] for i in range(20)])
+	pai2 = criar_individuo([[i + 200, i + 300] for i in range(25)])
+	genes1, genes2 = pai1.copy(), pai2.copy()
+
+	filho1, filho2 = _cruzamento_dois_pontos(pai1, pai2)
+
+	trocados = np.flatnonzero((filho1 != genes1[: len(filho1)]).any(axis=1))
+	assert trocados.size > 0
+	# Nas posições trocadas cada filho recebe exatamente os genes originais do outro pai
+	assert (filho1[trocados] == genes2[trocados]).all()
+	assert (filho2[trocados] == genes1[trocados]).all()
+	assert len(filho1) == 20 and len(filho2) == 25
+
+	assert not np.shares_memory(filho1, filho2)
+	filho2[trocados] = -1
+	assert (filho1[trocados] == genes2[trocados]).all()
+
+
+def genes_validos(individuo, qtd_bairros):
+	"""Um indivíduo válido tem de 20 a 40 genes (origem, destino), com origem != destino e índices de bairros existentes."""
+	return (
+		individuo.shape[1:] == (2,)
+		and 20 <= len(individuo) <= 40
+		and ((individuo >= 0) & (individuo < qtd_bairros)).all()
+		and (individuo[:, 0] != individuo[:, 1]).all()
+	)
+
+
+def test_gerar_populacao(otimizador):
+	"""A população inicial tem o tamanho pedido e só indivíduos válidos, com tamanhos variados."""
+	random.seed(11)
+	populacao = otimizador.setup_ga().population(n=200)
+
+	assert len(populacao) == 200
+	assert all(isinstance(ind, creator.Individual) and genes_validos(ind, otimizador.qtd_bairros) for ind in populacao)
+	assert len({len(ind) for ind in populacao}) > 1
+
+
+def test_mutacao_variavel(otimizador):
+	"""Remoções, inserções e trocas sucessivas mantêm o indivíduo dentro dos limites de tamanho e com genes válidos."""
+	random.seed(5)
+	toolbox = otimizador.setup_ga()
+	tamanhos = set()
+
+	for genes in ([[0, 1]] * 20, [[1, 2]] * 40):
+		individuo = criar_individuo(genes)
+		for _ in range(300):
+			(individuo,) = toolbox.mutate(individuo)
+			assert genes_validos(individuo, otimizador.qtd_bairros)
+			tamanhos.add(len(individuo))
+
+	assert {20, 40} <= tamanhos
@@ -1,6 +1,7 @@
 # test_processamento_geo.py
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
 import pytest
 from shapely.geometry import Point, Polygon
@@ -127,29 +128,30 @@ def test_associar_ibge_bairros(mocker, mock_bairros_gdf, mock_setores_gdf):
 	assert resultado["num_de_responsaveis"].iloc[0] == 0
 
 
-def test_agregar_renda_por_bairro(mocker, mock_bairros_gdf, mock_setores_gdf):
-	"""Testa a agregação (soma) de renda e população por bairro."""
-	mocker.patch("utils.constants.COLUNAS", COLUNAS_PARA_TESTE)
-
-	setores_sp = filtrar_setores_por_municipio(mock_setores_gdf, "SAO PAULO", "SP")
+def test_agregar_renda_por_bairro(mock_bairros_gdf, mock_setores_gdf):
+	"""Testa a agregação (soma) de renda e população por bairro, comparando com o sjoin seguido de groupby."""
+	setores_sp = filtrar_setores_por_municipio(mock_setores_gdf, "SAO PAULO")
 
-	# Modificar a geometria do Bairro A para conter os dois centroides de SP
+	# Bairro A passa a conter os centroides dos dois setores de SP; o índice não padrão verifica que o resultado segue o dos bairros
 	bairros_modificado = mock_bairros_gdf.copy()
 	bairros_modificado.loc[0, "geometry"] = Polygon([(-1, -1), (3, -1), (3, 3), (-1, 3)])
+	bairros_modificado.index = [10, 20]
 
 	resultado = agregar_renda_por_bairro(bairros_modificado, setores_sp, CRS_PROJETADO)
 
-	bairro_a = resultado[resultado["nome_bairro"] == "Bairro A"].iloc[0]
-	bairro_b = resultado[resultado["nome_bairro"] == "Bairro B"].iloc[0]
+	join_espacial = associar_ibge_bairros(bairros_modificado, setores_sp, CRS_PROJETADO)
+	esperado = join_espacial.groupby("index_right")[["renda_mensal_media", "num_de_moradores"]].sum().reindex(bairros_modificado.index, fill_value=0)
 
-	# Bairro A: soma dos setores '111' e '222'
-	assert bairro_a["populacao_total_bairro"] == 100 + 150
-	assert bairro_a["renda_total_bairro"] == pytest.approx(1500.50 + 2000.00)
+	assert resultado.index.equals(bairros_modificado.index)
+	assert resultado.crs == bairros_modificado.crs
+	np.testing.assert_allclose(resultado["renda_total_bairro"], esperado["renda_mensal_media"])
+	np.testing.assert_array_equal(resultado["populacao_total_bairro"], esperado["num_de_moradores"])
 
-	# Bairro B: não contém setores, deve ser zero
-	assert bairro_b["populacao_total_bairro"] == 0
-	assert bairro_b["renda_total_bairro"] == 0
-	assert bairro_b["renda_total_bairro"] == 0
+	# Bairro A: soma dos setores '111' e '222'; Bairro B: não contém setores, deve ser zero
+	assert resultado["populacao_total_bairro"].tolist() == [100 + 150, 0]
+	assert resultado["renda_total_bairro"].tolist() == pytest.approx([1500.50 + 2000.00, 0])
+	# A população mantém o tipo inteiro de num_de_moradores, tenha ou não o bairro algum setor
+	assert resultado["populacao_total_bairro"].dtype == esperado["num_de_moradores"].dtype
 
 
 def test_calcular_fluxos_od(mock_bairros_gdf, mock_origem_destino_gdfs):
@@ -168,6 +170,20 @@ def test_calcular_fluxos_od(mock_bairros_gdf, mock_origem_destino_gdfs):
 	assert bairro_b["fluxo_total"] == 1
 
 
+def test_calcular_fluxos_od_com_contagem(mock_bairros_gdf, mock_origem_destino_gdfs):
+	"""Testa a contagem por bairro quando cada ponto representa várias viagens."""
+	origem_gdf, destino_gdf = mock_origem_destino_gdfs
+	resultado = calcular_fluxos_od(mock_bairros_gdf, origem_gdf, destino_gdf, contagem_origem=np.array([3, 2]), contagem_destino=np.array([1, 4]))
+
+	bairro_a = resultado[resultado["nome_bairro"] == "Bairro A"].iloc[0]
+	bairro_b = resultado[resultado["nome_bairro"] == "Bairro B"].iloc[0]
+
+	assert bairro_a["n_origens"] == 5
+	assert bairro_a["n_destinos"] == 1
+	assert bairro_b["n_origens"] == 0
+	assert bairro_b["n_destinos"] == 4
+
+
 def test_calcular_densidade_populacional(mock_bairros_gdf):
 	"""Testa o cálculo da densidade populacional."""
 	bairros_com_pop = mock_bairros_gdf.copy()
@@ -61,11 +61,24 @@ def test_ler_shapefile_sem_crs_definido(mocker, tmp_path):
 	resultado_gdf = ler_shapefile(str(caminho_shp), target_crs=CRS_PROJETADO, original_epsg=4326)
 
 	# 4. Verifica os resultados
-	mock_read_file.assert_called_once_with(str(caminho_shp), ignore_geometry=False)
+	mock_read_file.assert_called_once_with(str(caminho_shp), bbox=None, mask=None, engine="pyogrio", use_arrow=mocker.ANY)
 	mock_print.assert_called_once_with("Aviso: CRS não definido para " + str(caminho_shp) + ". Assumindo EPSG:4326.")
 	assert resultado_gdf.crs.to_string() == CRS_PROJETADO
 
 
+def test_ler_shapefile_com_bbox(tmp_path):
+	"""Testa se apenas as feições que intersectam o retângulo informado são lidas."""
+	gdf_original = gpd.GeoDataFrame(
+		{"id": [1, 2]}, geometry=[Polygon([(0, 0), (1, 0), (1, 1), (0, 1)]), Polygon([(5, 5), (6, 5), (6, 6), (5, 6)])], crs=CRS_GEO
+	)
+	caminho_shp = tmp_path / "teste_bbox.shp"
+	gdf_original.to_file(caminho_shp, driver="ESRI Shapefile")
+
+	resultado_gdf = ler_shapefile(str(caminho_shp), target_crs=CRS_GEO, bbox=(4, 4, 7, 7))
+
+	assert resultado_gdf["id"].tolist() == [2]
+
+
 # --- Testes para leitores de CSV ---
 
 
@@ -110,6 +123,18 @@ def test_ler_od_csv(tmp_path):
 	assert "fluxo" in resultado_df.columns
 
 
+def test_ler_od_parquet(tmp_path):
+	"""Testa a leitura de um arquivo de origem-destino em Parquet."""
+	pytest.importorskip("pyarrow")
+	caminho_parquet = tmp_path / "od.parquet"
+	pd.DataFrame({"origem": ["A", "B"], "destino": ["B", "C"], "fluxo": [100, 200]}).to_parquet(caminho_parquet, index=False)
+
+	resultado_df = ler_od_csv(str(caminho_parquet))
+
+	assert isinstance(resultado_df, pd.DataFrame)
+	assert resultado_df["fluxo"].tolist() == [100, 200]
+
+
 def test_ler_renda_csv(tmp_path):
 	"""Testa a leitura de um CSV com separador e encoding customizados."""
 	caminho_csv = tmp_path / "renda.csv"
@@ -138,7 +163,7 @@ def test_ler_kml_sucesso(mocker):
 	# Mock para list_layers: simula um KML com duas camadas
 	mock_list_layers = mocker.patch("core.data_loader.list_layers", return_value=[("Camada de Pontos", "Point"), ("Camada de Poligonos", "Polygon")])
 
-	# Mock para gpd.read_file: retorna um GDF diferente para cada camada
+	# Mock para read_dataframe: retorna um GDF diferente para cada camada
 	gdf_pontos = gpd.GeoDataFrame({"nome": ["Ponto 1"]}, geometry=[Point(1, 1)], crs=CRS_GEO)
 	gdf_poligonos = gpd.GeoDataFrame({"nome": ["Area 1"]}, geometry=[Polygon([(2, 2), (3, 2), (3, 3), (2, 3)])], crs=CRS_GEO)
 
@@ -149,7 +174,7 @@ def test_ler_kml_sucesso(mocker):
 			return gdf_poligonos
 		return gpd.GeoDataFrame()
 
-	mock_read_file = mocker.patch("core.data_loader.gpd.read_file", side_effect=read_file_side_effect)
+	mock_read_file = mocker.patch("core.data_loader.read_dataframe", side_effect=read_file_side_effect)
 
 	# 2. Executa a função
 	resultado_gdf = ler_kml("caminho/falso/para/arquivo.kml", target_crs=CRS_PROJETADO)
@@ -183,11 +208,11 @@ def test_ler_kml_sem_camadas(mocker):
 
 def test_ler_kml_erro_na_leitura(mocker):
 	"""
-	Testa o tratamento de erro se gpd.read_file falhar.
+	Testa o tratamento de erro se read_dataframe falhar.
 	"""
 	mocker.patch("core.data_loader.list_layers", return_value=[("Camada 1", "Point")])
-	# Força gpd.read_file a levantar uma exceção
-	mocker.patch("core.data_loader.gpd.read_file", side_effect=Exception("Erro de leitura genérico"))
+	# Força read_dataframe a levantar uma exceção
+	mocker.patch("core.data_loader.read_dataframe", side_effect=Exception("Erro de leitura genérico"))
 	mock_print = mocker.patch("builtins.print")
 
 	resultado_gdf = ler_kml("caminho/falso/para/corrompido.kml", target_crs=CRS_PROJETADO)
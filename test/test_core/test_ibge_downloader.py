@@ -1,6 +1,9 @@
 # test/test_core/test_ibge_downloader.py
 
 import io
+import os
+import shutil
+import tempfile
 import zipfile
 from pathlib import Path
 from unittest.mock import MagicMock
@@ -9,7 +12,7 @@ import pytest
 import requests
 
 # Importe as funções do seu módulo
-from core.ibge_downloader import _baixar_e_descompactar_zip, baixar_dados_censo_renda, baixar_malha_municipal
+from core.ibge_downloader import _TIMEOUT_DOWNLOAD, _baixar_e_descompactar_zip, baixar_dados_censo_renda, baixar_malha_municipal
 
 # --- Testes para a função auxiliar _baixar_e_descompactar_zip ---
 
@@ -36,14 +39,14 @@ def test__baixar_e_descompactar_zip_sucesso(mocker, tmp_path):
 	mock_response.raise_for_status.return_value = None
 	mock_response.iter_content.return_value = [conteudo_zip_falso]  # Simula o conteúdo do download
 
-	# Mock do requests.get para retornar nossa resposta falsa
-	mock_requests_get = mocker.patch("core.ibge_downloader.requests.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
+	# Mock do get da sessão HTTP para retornar nossa resposta falsa
+	mock_requests_get = mocker.patch("core.ibge_downloader._SESSAO.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
 
 	# 2. Act: Executar a função
 	diretorio_resultado = _baixar_e_descompactar_zip(url_falsa, str(tmp_path))
 
 	# 3. Assert: Verificar os resultados
-	mock_requests_get.assert_called_once_with(url_falsa, stream=True)
+	mock_requests_get.assert_called_once_with(url_falsa, stream=True, timeout=_TIMEOUT_DOWNLOAD)
 	assert diretorio_resultado == str(tmp_path)
 
 	# Verifica se o arquivo foi descompactado
@@ -63,7 +66,7 @@ def test__baixar_e_descompactar_zip_com_uf(mocker, tmp_path):
 
 	mock_response = MagicMock()
 	mock_response.iter_content.return_value = [conteudo_zip_falso]
-	mocker.patch("core.ibge_downloader.requests.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
+	mocker.patch("core.ibge_downloader._SESSAO.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
 
 	diretorio_resultado = _baixar_e_descompactar_zip(url_falsa, str(tmp_path), uf="MG")
 
@@ -72,11 +75,52 @@ def test__baixar_e_descompactar_zip_com_uf(mocker, tmp_path):
 	assert (diretorio_esperado / "outro.txt").exists()
 
 
+@pytest.mark.parametrize(
+	("anuncia_tamanho", "limite_em_memoria", "usa_arquivo_temporario"), [(True, 1 << 20, False), (True, 10, True), (False, 1 << 20, True)]
+)
+def test__baixar_e_descompactar_zip_buffer(mocker, tmp_path, anuncia_tamanho, limite_em_memoria, usa_arquivo_temporario):
+	"""Testa se um .zip real, baixado em blocos, é extraído tanto do buffer em memória quanto do arquivo temporário."""
+	conteudo_zip_falso = criar_zip_falso_em_memoria("renda.csv", "CD_SETOR;V06001")
+
+	mock_response = MagicMock(headers={"Content-Length": str(len(conteudo_zip_falso))} if anuncia_tamanho else {})
+	mock_response.iter_content.return_value = [conteudo_zip_falso[:50], conteudo_zip_falso[50:]]
+	mocker.patch("core.ibge_downloader._SESSAO.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
+	mocker.patch("core.ibge_downloader._LIMITE_ZIP_EM_MEMORIA", limite_em_memoria)
+	espiao_arquivo_temporario = mocker.spy(tempfile, "TemporaryFile")
+
+	diretorio_resultado = _baixar_e_descompactar_zip("http://example.com/renda.zip", str(tmp_path))
+
+	assert diretorio_resultado == str(tmp_path)
+	assert (tmp_path / "renda.csv").read_text() == "CD_SETOR;V06001"
+	assert espiao_arquivo_temporario.call_count == int(usa_arquivo_temporario)
+
+
+def test__baixar_e_descompactar_zip_move_sentinela_por_ultimo(mocker, tmp_path):
+	"""Testa se o .shp procurado pela verificação de download já feito só chega ao destino depois dos demais arquivos."""
+	nomes = ["MG_setores_CD2022.shp", "MG_setores_CD2022.dbf", "MG_setores_CD2022.shx"]
+	memoria_zip = io.BytesIO()
+	with zipfile.ZipFile(memoria_zip, "w") as zf:
+		for nome in nomes:
+			zf.writestr(nome, nome)
+
+	mock_response = MagicMock()
+	mock_response.iter_content.return_value = [memoria_zip.getvalue()]
+	mocker.patch("core.ibge_downloader._SESSAO.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
+	espiao_replace = mocker.spy(os, "replace")
+
+	diretorio_resultado = _baixar_e_descompactar_zip("http://example.com/MG.zip", str(tmp_path), uf="MG")
+
+	destinos = [Path(chamada.args[1]).name for chamada in espiao_replace.call_args_list]
+	assert sorted(destinos) == sorted(nomes)
+	assert destinos[-1] == "MG_setores_CD2022.shp"
+	assert sorted(arquivo.name for arquivo in Path(diretorio_resultado).iterdir()) == sorted(nomes)
+
+
 def test__baixar_e_descompactar_zip_falha_conexao(mocker, tmp_path):
 	"""Testa o tratamento de erro para falha de conexão (RequestException)."""
 	url_falsa = "http://host.invalido/arquivo.zip"
 	# Mock para levantar uma exceção de conexão
-	mocker.patch("core.ibge_downloader.requests.get", side_effect=requests.exceptions.RequestException("Erro de DNS"))
+	mocker.patch("core.ibge_downloader._SESSAO.get", side_effect=requests.exceptions.RequestException("Erro de DNS"))
 	mock_print = mocker.patch("builtins.print")
 
 	resultado = _baixar_e_descompactar_zip(url_falsa, str(tmp_path))
@@ -92,7 +136,7 @@ def test__baixar_e_descompactar_zip_arquivo_invalido(mocker, tmp_path):
 	conteudo_invalido = b"isso nao e um zip"
 	mock_response = MagicMock()
 	mock_response.iter_content.return_value = [conteudo_invalido]
-	mocker.patch("core.ibge_downloader.requests.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
+	mocker.patch("core.ibge_downloader._SESSAO.get", return_value=MagicMock(__enter__=MagicMock(return_value=mock_response)))
 	mock_print = mocker.patch("builtins.print")
 
 	resultado = _baixar_e_descompactar_zip(url_falsa, str(tmp_path))
@@ -104,8 +148,20 @@ def test__baixar_e_descompactar_zip_arquivo_invalido(mocker, tmp_path):
 # --- Testes para as funções públicas ---
 
 
-def test_baixar_malha_municipal_sucesso(mocker, tmp_path):
+@pytest.fixture
+def diretorio_compartilhado(shared_tmp):
+	"""Entrega o diretório temporário da sessão e o esvazia ao final do teste, para que um teste não veja os arquivos do outro."""
+	yield shared_tmp
+	for caminho in shared_tmp.iterdir():
+		if caminho.is_dir():
+			shutil.rmtree(caminho)
+		else:
+			caminho.unlink()
+
+
+def test_baixar_malha_municipal_sucesso(mocker, diretorio_compartilhado):
 	"""Testa se a função constrói a URL correta e chama o helper."""
+	tmp_path = diretorio_compartilhado
 	uf, ano = "SP", 2023
 	diretorio_extraido_falso = tmp_path / uf
 	diretorio_extraido_falso.mkdir()
@@ -135,8 +191,19 @@ def test_baixar_malha_municipal_falha(mocker, tmp_path):
 	mock_helper.assert_called_once()
 
 
-def test_baixar_dados_censo_renda_sucesso(mocker, tmp_path):
+def test_baixar_malha_municipal_ignora_extracao_interrompida(mocker, tmp_path):
+	"""Testa se um .shp deixado no diretório provisório de uma extração interrompida não é tomado como resultado."""
+	diretorio_uf = tmp_path / "MG"
+	(diretorio_uf / ".extraindo_abc").mkdir(parents=True)
+	(diretorio_uf / ".extraindo_abc" / "MG_setores_CD2022.shp").touch()
+	mocker.patch("core.ibge_downloader._baixar_e_descompactar_zip", return_value=str(diretorio_uf))
+
+	assert baixar_malha_municipal(str(tmp_path), uf="MG") is None
+
+
+def test_baixar_dados_censo_renda_sucesso(mocker, diretorio_compartilhado):
 	"""Testa se a função de download do censo constrói a URL e chama o helper."""
+	tmp_path = diretorio_compartilhado
 	ano = 2022
 	diretorio_extraido_falso = tmp_path / "censo_data"
 	diretorio_extraido_falso.mkdir()
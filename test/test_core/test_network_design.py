@@ -0,0 +1,263 @@
+import geopandas as gpd
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.sparse.csgraph import dijkstra
+from scipy.spatial import cKDTree
+from shapely.geometry import LineString, Point, box
+
+from core.network_design import (
+	criar_grafo_ponderado,
+	encontrar_caminho_minimo,
+	encontrar_no_mais_proximo,
+	filtrar_sublinhas,
+	grafo_para_matriz_esparsa,
+	reconstruir_caminho,
+)
+from utils import columns, constants
+
+CRS = "EPSG:31983"
+
+
+@pytest.fixture
+def gdf_bairros():
+	"""Um bairro sem polo cujo centroide fica longe das vias, para que só o desconto de articulação atue."""
+	return gpd.GeoDataFrame({columns.NOME_BAIRRO: ["Centro"], columns.POLO: ["Nenhum"]}, geometry=[box(-5000, 4000, -4000, 5000)], crs=CRS)
+
+
+@pytest.fixture
+def gdf_articulacao():
+	"""Um único ponto de articulação no meio do primeiro segmento das vias de teste."""
+	return gpd.GeoDataFrame(geometry=[Point(50, 0)], crs=CRS)
+
+
+def peso_esperado(comprimento, ponto_medio):
+	"""Peso com o desconto linear de até 40% em função da distância ao ponto de articulação (50, 0)."""
+	distancia = Point(ponto_medio).distance(Point(50, 0))
+	return max(comprimento * (1 - 0.4 * max(0, 1 - distancia / 1000)), 0.1)
+
+
+class TestCriarGrafoPonderado:
+	def test_arestas_por_segmento_e_sentido(self, gdf_bairros, gdf_articulacao):
+		"""Cada segmento vira uma aresta no sentido da via (0 = mão dupla, 1 = direto, -1 = inverso) e geometrias que não são linhas são ignoradas."""
+		gdf_vias = gpd.GeoDataFrame(
+			{"ID": [10, 20, 30, 40], "DIR": [0, 1, -1, 0]},
+			geometry=[LineString([(0, 0), (100, 0), (200, 0)]), LineString([(200, 0), (200, 100)]), LineString([(0, 0), (0, 100)]), Point(500, 500)],
+			crs=CRS,
+		)
+
+		grafo = criar_grafo_ponderado(gdf_vias, gdf_articulacao, gdf_bairros)
+
+		assert set(grafo.edges()) == {
+			((0.0, 0.0), (100.0, 0.0)),
+			((100.0, 0.0), (0.0, 0.0)),
+			((100.0, 0.0), (200.0, 0.0)),
+			((200.0, 0.0), (100.0, 0.0)),
+			((200.0, 0.0), (200.0, 100.0)),
+			((0.0, 100.0), (0.0, 0.0)),
+		}
+
+		atributos = grafo.get_edge_data((0.0, 0.0), (100.0, 0.0))[0]
+		assert atributos["via_id"] == 10
+		assert atributos["original_weight"] == pytest.approx(100)
+		assert atributos["weight"] == pytest.approx(peso_esperado(100, (50, 0)))
+
+		assert grafo.get_edge_data((200.0, 0.0), (200.0, 100.0))[0]["weight"] == pytest.approx(peso_esperado(100, (200, 50)))
+		assert grafo.get_edge_data((0.0, 100.0), (0.0, 0.0))[0]["via_id"] == 30
+
+	def test_desconto_de_polo(self, gdf_articulacao):
+		"""Segmentos perto do centroide de um polo consolidado recebem também o desconto do polo."""
+		gdf_bairros = gpd.GeoDataFrame({columns.NOME_BAIRRO: ["Polo"], columns.POLO: ["Consolidado"]}, geometry=[box(1900, -100, 2100, 100)], crs=CRS)
+		gdf_vias = gpd.GeoDataFrame({"ID": [1], "DIR": [1]}, geometry=[LineString([(1950, 0), (2050, 0)])], crs=CRS)
+
+		grafo = criar_grafo_ponderado(gdf_vias, gdf_articulacao, gdf_bairros)
+
+		# Ponto de articulação a mais de 1 km (sem desconto) e ponto médio sobre o centroide do polo (desconto máximo de 30%)
+		assert grafo.get_edge_data((1950.0, 0.0), (2050.0, 0.0))[0]["weight"] == pytest.approx(70)
+
+	def test_desconto_de_polo_segue_o_bairro_mais_proximo(self, gdf_articulacao):
+		"""Com bairros de tipos diferentes, cada segmento recebe o desconto do polo do bairro cujo centroide é o mais próximo dele."""
+		gdf_bairros = gpd.GeoDataFrame(
+			{columns.NOME_BAIRRO: ["Leste", "Oeste"], columns.POLO: ["Nenhum", "Consolidado"]},
+			geometry=[box(1900, -100, 2100, 100), box(-2100, -100, -1900, 100)],
+			crs=CRS,
+		)
+		gdf_vias = gpd.GeoDataFrame(
+			{"ID": [1, 2], "DIR": [1, 1]}, geometry=[LineString([(1950, 0), (2050, 0)]), LineString([(-2050, 0), (-1950, 0)])], crs=CRS
+		)
+
+		grafo = criar_grafo_ponderado(gdf_vias, gdf_articulacao, gdf_bairros)
+
+		assert grafo.get_edge_data((1950.0, 0.0), (2050.0, 0.0))[0]["weight"] == pytest.approx(100)
+		assert grafo.get_edge_data((-2050.0, 0.0), (-1950.0, 0.0))[0]["weight"] == pytest.approx(70)
+
+	def test_parametros_de_cada_tipo_de_polo(self, gdf_articulacao):
+		"""Com a coluna categórica de polos, cada tipo usa o seu desconto máximo, na ordem das linhas de gdf_bairros."""
+		tipos = ["Planejado", "Emergente", "Nenhum", "Consolidado"]
+		centros_x = [3000, -3000, 9000, 6000]
+		gdf_bairros = gpd.GeoDataFrame(
+			{columns.NOME_BAIRRO: tipos, columns.POLO: pd.Categorical(tipos, categories=constants.TIPOS_POLO)},
+			geometry=[box(x - 100, 4900, x + 100, 5100) for x in centros_x],
+			crs=CRS,
+		)
+		gdf_vias = gpd.GeoDataFrame(
+			{"ID": [1, 2, 3, 4], "DIR": [1, 1, 1, 1]}, geometry=[LineString([(x - 50, 5000), (x + 50, 5000)]) for x in centros_x], crs=CRS
+		)
+
+		grafo = criar_grafo_ponderado(gdf_vias, gdf_articulacao, gdf_bairros)
+
+		# Ponto médio de cada segmento sobre o centroide do seu bairro: desconto máximo de 10% (Planejado), 50% (Emergente), 0 e 30% (Consolidado)
+		pesos = [grafo.get_edge_data((x - 50.0, 5000.0), (x + 50.0, 5000.0))[0]["weight"] for x in centros_x]
+		assert pesos == pytest.approx([90, 50, 100, 70])
+
+	def test_sem_pontos_de_articulacao(self, gdf_bairros):
+		"""Sem pontos de articulação não há como ponderar as arestas."""
+		gdf_vias = gpd.GeoDataFrame({"ID": [1], "DIR": [0]}, geometry=[LineString([(0, 0), (1, 0)])], crs=CRS)
+
+		with pytest.raises(ValueError):
+			criar_grafo_ponderado(gdf_vias, gpd.GeoDataFrame(geometry=[], crs=CRS), gdf_bairros)
+
+	def test_direcao_invalida(self, gdf_bairros, gdf_articulacao):
+		"""A direção da via precisa ser inteira."""
+		gdf_vias = gpd.GeoDataFrame({"ID": [1], "DIR": [0.5]}, geometry=[LineString([(0, 0), (1, 0)])], crs=CRS)
+
+		with pytest.raises(ValueError, match="direção"):
+			criar_grafo_ponderado(gdf_vias, gdf_articulacao, gdf_bairros)
+
+
+def test_encontrar_no_mais_proximo():
+	"""Retorna o índice do nó mais próximo na árvore, e não a sua coordenada."""
+	arvore_nos = cKDTree([(0.0, 0.0), (100.0, 0.0), (100.0, 100.0)])
+
+	idx = encontrar_no_mais_proximo(Point(90, 80), arvore_nos)
+
+	assert idx == 2
+	assert isinstance(idx, int)
+
+
+class TestGrafoParaMatrizEsparsa:
+	def test_mantem_a_aresta_paralela_de_menor_peso(self):
+		"""Cada par (origem, destino) vira uma única entrada da matriz, com o menor peso entre as arestas paralelas."""
+		grafo = nx.MultiDiGraph()
+		grafo.add_edge((0.0, 0.0), (1.0, 0.0), weight=5.0)
+		grafo.add_edge((0.0, 0.0), (1.0, 0.0), weight=2.0)
+		grafo.add_edge((0.0, 0.0), (1.0, 0.0), weight=7.0)
+		grafo.add_edge((1.0, 0.0), (0.0, 0.0), weight=3.0)
+		grafo.add_edge((1.0, 0.0), (2.0, 0.0), weight=4.0)
+
+		matriz, nos, indice_nos = grafo_para_matriz_esparsa(grafo)
+
+		assert nos == list(grafo.nodes())
+		assert indice_nos == {no: i for i, no in enumerate(nos)}
+		assert matriz.shape == (3, 3)
+		assert matriz.nnz == 3
+
+		a, b, c = (indice_nos[no] for no in [(0.0, 0.0), (1.0, 0.0), (2.0, 0.0)])
+		assert matriz[a, b] == 2.0
+		assert matriz[b, a] == 3.0
+		assert matriz[b, c] == 4.0
+		assert matriz[c, b] == 0
+
+	def test_grafo_vazio(self):
+		"""Um grafo sem nós gera uma matriz 0 x 0."""
+		matriz, nos, indice_nos = grafo_para_matriz_esparsa(nx.MultiDiGraph())
+
+		assert matriz.shape == (0, 0)
+		assert nos == []
+		assert indice_nos == {}
+
+
+class TestReconstruirCaminho:
+	def test_caminho_a_partir_dos_predecessores(self):
+		"""Segue os predecessores do Dijkstra do destino até a origem e devolve o caminho no sentido origem -> destino."""
+		grafo = nx.MultiDiGraph()
+		grafo.add_edge((0.0, 0.0), (1.0, 0.0), weight=1.0)
+		grafo.add_edge((1.0, 0.0), (2.0, 0.0), weight=1.0)
+		grafo.add_edge((0.0, 0.0), (2.0, 0.0), weight=5.0)
+		grafo.add_edge((3.0, 0.0), (0.0, 0.0), weight=1.0)
+		matriz, _, indice_nos = grafo_para_matriz_esparsa(grafo)
+		origem, meio, destino, isolado = (indice_nos[(x, 0.0)] for x in (0.0, 1.0, 2.0, 3.0))
+
+		_, predecessores = dijkstra(matriz, directed=True, indices=origem, return_predecessors=True)
+
+		assert reconstruir_caminho(predecessores, origem, destino) == [origem, meio, destino]
+		assert reconstruir_caminho(predecessores, origem, origem) == [origem]
+		# O nó 3 só tem aresta de saída, então não é alcançável a partir da origem
+		assert reconstruir_caminho(predecessores, origem, isolado) is None
+
+	def test_predecessores_de_outra_origem(self):
+		"""Se a cadeia de predecessores não passa pela origem pedida, não há caminho."""
+		predecessores = np.array([-9999, 0, 1])
+
+		assert reconstruir_caminho(predecessores, 1, 2) == [1, 2]
+		assert reconstruir_caminho(predecessores, 2, 1) is None
+
+
+class TestFiltrarSublinhas:
+	def test_remove_trechos_contidos(self):
+		"""Uma linha contida em outra é removida; linhas disjuntas são mantidas."""
+		gdf = gpd.GeoDataFrame(
+			{"id": ["a", "b", "c"]},
+			geometry=[LineString([(0, 0), (1, 0), (2, 0)]), LineString([(1, 0), (2, 0)]), LineString([(0, 1), (1, 1)])],
+			crs=CRS,
+		)
+
+		assert filtrar_sublinhas(gdf)["id"].tolist() == ["a", "c"]
+
+	def test_vazio(self):
+		"""Um GeoDataFrame vazio é devolvido sem alterações."""
+		gdf = gpd.GeoDataFrame(geometry=[], crs=CRS)
+		assert filtrar_sublinhas(gdf) is gdf
+
+
+class TestEncontrarCaminhoMinimo:
+	@pytest.fixture
+	def grafo(self):
+		"""Grade 3x3 com espaçamento de 100 m e pesos distintos em cada sentido, para que cada caminho mínimo seja único."""
+		rng = np.random.default_rng(7)
+		grafo = nx.MultiDiGraph()
+		for x in range(0, 300, 100):
+			for y in range(0, 300, 100):
+				for vizinho in ((x + 100, y), (x, y + 100)):
+					if max(vizinho) > 200:
+						continue
+					no, outro = (float(x), float(y)), (float(vizinho[0]), float(vizinho[1]))
+					grafo.add_edge(no, outro, weight=float(rng.uniform(50, 150)))
+					grafo.add_edge(outro, no, weight=float(rng.uniform(50, 150)))
+		return grafo
+
+	@pytest.fixture
+	def gdf_bairros_grade(self):
+		"""Bairros quadrados centrados nos nós da grade, além de um bairro sem polígono que deve ser ignorado."""
+		centros = {"Centro": (100, 100), "A": (0, 0), "B": (200, 200), "C": (0, 200)}
+		geometrias = [box(x - 25, y - 25, x + 25, y + 25) for x, y in centros.values()]
+		return gpd.GeoDataFrame({columns.NOME_BAIRRO: [*centros, "Ponto"]}, geometry=[*geometrias, Point(200, 0)], crs=CRS)
+
+	@pytest.mark.parametrize("sentido", ["IDA", "VOLTA"])
+	def test_rotas_iguais_ao_networkx(self, grafo, gdf_bairros_grade, sentido):
+		"""Cada rota deve ser o caminho mínimo entre o nó do bairro e o nó do centro, no sentido pedido."""
+		rotas = encontrar_caminho_minimo(gdf_bairros_grade, grafo, bairro_central="Centro", sentido=sentido)
+
+		assert rotas["bairro_origem"].tolist() == ["A", "B", "C"]
+		assert rotas["id"].tolist() == [f"{i}{sentido[0]}" for i in (1, 2, 3)]
+
+		centros = {"A": (0.0, 0.0), "B": (200.0, 200.0), "C": (0.0, 200.0)}
+		for rota in rotas.itertuples():
+			origem, destino = centros[rota.bairro_origem], (100.0, 100.0)
+			if sentido == "VOLTA":
+				origem, destino = destino, origem
+
+			caminho = nx.shortest_path(grafo, origem, destino, weight="weight")
+			assert list(rota.geometry.coords) == caminho
+
+			nomes_esperados = set(gdf_bairros_grade[gdf_bairros_grade.intersects(rota.geometry)][columns.NOME_BAIRRO])
+			assert set(rota.bairros_lista.split(", ")) == nomes_esperados
+			assert rota.bairros_atendidos_n == len(nomes_esperados)
+
+	def test_grafo_vazio(self, gdf_bairros_grade):
+		"""Sem nós no grafo o resultado é um GeoDataFrame vazio no CRS projetado."""
+		rotas = encontrar_caminho_minimo(gdf_bairros_grade, nx.MultiDiGraph())
+
+		assert rotas.empty
+		assert rotas.crs == CRS
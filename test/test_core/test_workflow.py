@@ -1,9 +1,12 @@
+import functools
 from unittest.mock import MagicMock
 
 import geopandas as gpd
 import pandas as pd
 import pytest
+from shapely.geometry import Point
 
+import core.visualization
 from core.workflow import ModeloReset
 
 
@@ -12,7 +15,9 @@ def mock_modulos(mocker):
 	"""Fixture que mocka os módulos inteiros de dependência."""
 	mock_data_loader = mocker.patch("core.workflow.data_loader")
 	mock_analysis = mocker.patch("core.workflow.analysis")
-	mock_visualization = mocker.patch("core.workflow.visualization")
+	# visualization é importado sob demanda dentro dos métodos, então o mock é aplicado no pacote;
+	# o import explícito no topo garante que o submódulo já seja atributo de core
+	mock_visualization = mocker.patch.object(core, "visualization")
 	return mock_data_loader, mock_analysis, mock_visualization
 
 
@@ -91,6 +96,73 @@ class TestModeloReset:
 		assert modelo.camadas["bairros"] is gdf_final_bairros
 		assert modelo.camadas["setores"] is gdf_com_renda
 
+	def test_processar_dados_cache_acompanha_camada_de_bairros(self, mocker, tmp_path):
+		"""Testa se o cache da camada processada só é reaproveitado quando a camada de bairros de entrada é a mesma."""
+		pytest.importorskip("pyarrow")
+		mocker.patch("core.workflow._DIRETORIO_DADOS", str(tmp_path))
+		arquivo_setores, arquivo_renda = tmp_path / "setores.shp", tmp_path / "renda.csv"
+		arquivo_setores.touch()
+		arquivo_renda.touch()
+		mocker.patch("core.ibge_downloader.baixar_malha_municipal", return_value=str(arquivo_setores))
+		mocker.patch("core.ibge_downloader.baixar_dados_censo_renda", return_value=str(arquivo_renda))
+		mock_data_loader = mocker.patch("core.workflow.data_loader")
+		mock_data_loader.ler_shapefile.return_value = gpd.GeoDataFrame({"NM_MUN": ["Teste"]}, geometry=[Point(0, 0)], crs="EPSG:4326")
+		mock_data_loader.ler_renda_csv.return_value = pd.DataFrame({"CD_SETOR": ["1"]})
+
+		modelo = ModeloReset()
+		modelo.carregar_dados_ibge(ano_censo=2022)
+
+		# O processamento é substituído por uma marcação da camada de entrada, para contar quantas vezes ele roda
+		def processar_renda(municipio):
+			modelo.camadas["bairros"] = modelo.camadas["bairros"].assign(processado=True)
+
+		modelo._processar_renda_ibge = MagicMock(side_effect=processar_renda)
+		modelo._processar_densidade = MagicMock()
+		bairros_originais = gpd.GeoDataFrame({"NM_BAIRRO": ["A", "B", "C"]}, geometry=[Point(i, i) for i in range(3)], crs="EPSG:4326")
+
+		modelo.camadas["bairros"] = bairros_originais.copy()
+		modelo.processar_dados("Teste", usar_cache=True)
+		modelo.camadas["bairros"] = bairros_originais.iloc[:2].copy()
+		modelo.processar_dados("Teste", usar_cache=True)
+
+		assert modelo._processar_renda_ibge.call_count == 2
+		assert modelo.camadas["bairros"]["NM_BAIRRO"].tolist() == ["A", "B"]
+
+		modelo.camadas["bairros"] = bairros_originais.copy()
+		modelo.processar_dados("Teste", usar_cache=True)
+
+		assert modelo._processar_renda_ibge.call_count == 2
+		assert modelo.camadas["bairros"]["NM_BAIRRO"].tolist() == ["A", "B", "C"]
+		assert modelo.camadas["bairros"]["processado"].all()
+
+	def test_carregar_e_processar_od_cache_de_leitura(self, mocker, tmp_path):
+		"""Testa se a leitura do arquivo OD só é reaproveitada com usar_cache e se cada chamada recebe a sua própria cópia."""
+		# Um cache novo, para que leituras de outros testes não interfiram na contagem
+		mocker.patch("core.workflow._ler_arquivo_em_cache", functools.lru_cache(maxsize=3)(core.workflow._ler_arquivo_em_cache.__wrapped__))
+		mocker.patch("core.workflow.analysis")
+		arquivo_od = tmp_path / "od.csv"
+		arquivo_od.touch()
+		df_od = pd.DataFrame({"id": [1, 2]})
+		mock_ler_od = mocker.patch("core.workflow.data_loader.ler_od_csv", return_value=df_od)
+
+		modelo = ModeloReset()
+		modelo._pontos_od_unicos = MagicMock(return_value=(None, None))
+		modelo._indice_espacial_bairros = MagicMock()
+
+		# Sem usar_cache, cada chamada lê o arquivo de novo
+		modelo.carregar_e_processar_od(str(arquivo_od))
+		modelo.carregar_e_processar_od(str(arquivo_od))
+		assert mock_ler_od.call_count == 2
+
+		modelo.carregar_e_processar_od(str(arquivo_od), usar_cache=True)
+		modelo.carregar_e_processar_od(str(arquivo_od), usar_cache=True)
+		assert mock_ler_od.call_count == 3
+
+		# _pontos_od_unicos recebe o DataFrame duas vezes por chamada (origens e destinos)
+		lidos_do_cache = [chamada.args[0] for chamada in modelo._pontos_od_unicos.call_args_list[4::2]]
+		assert lidos_do_cache[0] is not lidos_do_cache[1]
+		assert all(df is not df_od and df.equals(df_od) for df in lidos_do_cache)
+
 	def test_identificar_polos_desenvolvimento(self, mock_modulos, gdf_fake):
 		"""Testa se a identificação de polos chama a análise e o set_polos."""
 		_, mock_analysis, _ = mock_modulos